@@ -0,0 +1,183 @@
+import json
+import os
+
+import pygame
+
+ASSET_DIR = 'assets'
+CACHE_DIR = '.asset_cache'
+
+# small sprites that are packed into one atlas surface
+ATLAS_SPRITES = ('enemy1', 'player', 'laser_player', 'icon')
+ATLAS_WIDTH = 256
+ATLAS_PADDING = 1  # keeps neighbouring sprites apart
+
+
+def has_transparency(surface: pygame.Surface) -> bool:
+    """
+    checks if any pixel of the surface is not fully opaque
+    :param surface: decoded image
+    :return: boolean
+    """
+
+    if not surface.get_flags() & pygame.SRCALPHA:
+        return surface.get_colorkey() is not None
+    return int(pygame.surfarray.pixels_alpha(surface).min()) < 255
+
+
+def pack(sizes: dict, width: int, padding: int) -> tuple:
+    """
+    places rectangles on shelves, tallest first, each shelf is as high as its first rectangle
+    :param sizes: maps a name to its (width, height)
+    :param width: width of the atlas
+    :param padding: gap left around every rectangle
+    :return: tuple of (dict mapping a name to its (x, y, width, height), atlas height)
+    """
+
+    regions = {}
+    x = y = shelf_height = 0
+    for name in sorted(sizes, key=lambda n: sizes[n][1], reverse=True):
+        w, h = sizes[name]
+        if x + w > width:
+            # the shelf is full, open the next one
+            x, y = 0, y + shelf_height + padding
+            shelf_height = 0
+        regions[name] = (x, y, w, h)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+    return regions, y + shelf_height
+
+
+class AssetManager:
+    """
+    A class to load the game assets on first use
+    images are converted to the display pixel format with convert() when they are opaque and convert_alpha()
+    when they actually have transparent pixels, the small sprites share one atlas surface, decoded pixels
+    are cached on disk so later launches skip the PNG decoding
+    ...
+    Attributes
+    ----------
+    asset_dir : str     directory holding the PNG files
+    cache_dir : str     directory holding the decoded pixel cache, None disables the disk cache
+    images : dict       converted surfaces by name
+    fonts : dict        fonts by (name, size)
+    atlas : Surface     the packed small sprites, None until one of them is used
+    progress : float    fraction of the last preload() done, safe to read from another thread
+
+    Methods
+    -------
+    image(name) -> Surface :    returns the converted image, loading it on the first call
+    font(name, size) -> Font :  returns the font, creating it on the first call
+    preload(names) -> None : loads the atlas and the named images up front, every image when names is None
+    """
+    def __init__(self, asset_dir=ASSET_DIR, cache_dir=CACHE_DIR):
+        self.asset_dir = asset_dir
+        self.cache_dir = cache_dir
+        self.images = {}
+        self.fonts = {}
+        self.atlas = None
+        self.progress = 0.0
+
+    def image(self, name: str) -> pygame.Surface:
+        surface = self.images.get(name)
+        if surface is None:
+            if name in ATLAS_SPRITES:
+                self.load_atlas()
+            else:
+                self.images[name] = self.load_image(name)
+            surface = self.images[name]
+        return surface
+
+    def font(self, name: str, size: int) -> pygame.font.Font:
+        font = self.fonts.get((name, size))
+        if font is None:
+            font = self.fonts[(name, size)] = pygame.font.Font(name, size)
+        return font
+
+    def preload(self, names=None) -> None:
+        if names is None:
+            names = [os.path.splitext(file)[0] for file in sorted(os.listdir(self.asset_dir)) if file.endswith('.png')]
+        names = [name for name in names if name not in ATLAS_SPRITES]
+        self.progress = 0.0
+        self.load_atlas()
+        for i, name in enumerate(names):
+            self.progress = (i + 1) / (len(names) + 1)
+            self.image(name)
+        self.progress = 1.0
+
+    def source_path(self, name: str) -> str:
+        return os.path.join(self.asset_dir, name + '.png')
+
+    def stamp(self, names) -> list:
+        # a cache entry is only valid for the exact source files it was built from
+        stamp = []
+        for name in names:
+            stat = os.stat(self.source_path(name))
+            stamp.append([name, stat.st_mtime_ns, stat.st_size])
+        return stamp
+
+    def read_cache(self, key: str, stamp: list):
+        """
+        :return: tuple of (header dict, pixel bytes) or None when there is no valid entry
+        """
+
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, key + '.raw'), 'rb') as file:
+                header = json.loads(file.readline())
+                if header['stamp'] != stamp:
+                    return None
+                return header, file.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def write_cache(self, key: str, header: dict, pixels: bytes) -> None:
+        if self.cache_dir is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = os.path.join(self.cache_dir, key + '.raw')
+            with open(path + '.tmp', 'wb') as file:
+                file.write(json.dumps(header).encode() + b'\n')
+                file.write(pixels)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            # the cache is only an optimisation, a read only directory must not stop the game
+            pass
+
+    @staticmethod
+    def convert(header: dict, pixels: bytes) -> pygame.Surface:
+        surface = pygame.image.frombytes(pixels, tuple(header['size']), header['format'])
+        return surface.convert_alpha() if header['format'] == 'RGBA' else surface.convert()
+
+    def load_image(self, name: str) -> pygame.Surface:
+        stamp = self.stamp([name])
+        cached = self.read_cache(name, stamp)
+        if cached is None:
+            decoded = pygame.image.load(self.source_path(name))
+            pixel_format = 'RGBA' if has_transparency(decoded) else 'RGB'
+            header = {'stamp': stamp, 'size': list(decoded.get_size()), 'format': pixel_format}
+            cached = header, pygame.image.tobytes(decoded, pixel_format)
+            self.write_cache(name, *cached)
+        return self.convert(*cached)
+
+    def load_atlas(self) -> None:
+        if self.atlas is not None:
+            return
+        stamp = self.stamp(ATLAS_SPRITES)
+        cached = self.read_cache('atlas', stamp)
+        if cached is None:
+            decoded = {name: pygame.image.load(self.source_path(name)) for name in ATLAS_SPRITES}
+            regions, height = pack({name: image.get_size() for name, image in decoded.items()},
+                                   ATLAS_WIDTH, ATLAS_PADDING)
+            atlas = pygame.Surface((ATLAS_WIDTH, height), pygame.SRCALPHA)
+            for name, image in decoded.items():
+                atlas.blit(image, regions[name][:2])
+            header = {'stamp': stamp, 'size': [ATLAS_WIDTH, height], 'format': 'RGBA', 'regions': regions}
+            cached = header, pygame.image.tobytes(atlas, 'RGBA')
+            self.write_cache('atlas', *cached)
+        header, _ = cached
+        self.atlas = self.convert(*cached)
+        for name, region in header['regions'].items():
+            # subsurfaces share the atlas pixels
+            self.images[name] = self.atlas.subsurface(region)
@@ -0,0 +1,51 @@
+"""
+Setup and timing helpers shared by the benchmark scripts
+
+importing this module selects the dummy video driver unless another one was chosen, makes the repository root
+the working directory (the assets are loaded with paths relative to it) and puts it on sys.path, so the scripts
+run from any directory and import the game modules right after it
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.chdir(ROOT)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def time_call(call, repeat: int, warm_up=0) -> float:
+    """
+    :param call: called without arguments
+    :param repeat: timed calls
+    :param warm_up: untimed calls before the timed ones
+    :return: mean milliseconds per call
+    """
+
+    for _ in range(warm_up):
+        call()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def time_frames(frame, frames: int) -> float:
+    """
+    :param frame: called with the index of the frame
+    :param frames: timed frames
+    :return: mean milliseconds per frame
+    """
+
+    start = time.perf_counter()
+    for i in range(frames):
+        frame(i)
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def argument_parser(doc: str) -> argparse.ArgumentParser:
+    # the first line of the script's docstring describes it in --help
+    return argparse.ArgumentParser(description=doc.strip().splitlines()[0])
@@ -0,0 +1,78 @@
+"""
+Asset loading and blit cost, before and after the asset manager
+
+startup compares the old import time loading (every PNG decoded and converted with convert_alpha) with the
+AssetManager on a cold disk cache and on a warm one, blit cost compares one frame's worth of blits from the
+old surfaces and from the managed ones (opaque background through convert(), sprites from the atlas)
+
+usage: python benchmarks/bench_assets.py [--repeat N]
+"""
+import shutil
+import tempfile
+
+import pygame
+
+import _common
+from asset_manager import AssetManager
+
+IMAGES = ('icon', 'enemy1', 'player', 'background', 'laser_player')
+SPRITES = (('enemy1', 4), ('player', 1), ('laser_player', 1))
+
+
+def load_before() -> dict:
+    # what main.py did at import time before the asset manager
+    images = {'icon': pygame.image.load('assets/icon.png')}
+    for name in IMAGES[1:]:
+        images[name] = pygame.image.load(f'assets/{name}.png').convert_alpha()
+    return images
+
+
+def load_after(cache_dir: str) -> dict:
+    assets = AssetManager(cache_dir=cache_dir)
+    return {name: assets.image(name) for name in IMAGES}
+
+
+def blit_frame(screen: pygame.Surface, images: dict) -> None:
+    screen.blit(images['background'], (0, 0))
+    for name, count in SPRITES:
+        for i in range(count):
+            screen.blit(images[name], (100 + i * 150, 300))
+
+
+def main(repeat: int) -> None:
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    cache_dir = tempfile.mkdtemp()
+    try:
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            return load_after(cache_dir)
+
+        before_ms = _common.time_call(load_before, repeat)
+        cold_ms = _common.time_call(cold, repeat)
+        load_after(cache_dir)
+        warm_ms = _common.time_call(lambda: load_after(cache_dir), repeat)
+        print('asset startup ms')
+        print(f'  before (decode + convert_alpha)   {before_ms:8.3f}')
+        print(f'  after, cold cache                 {cold_ms:8.3f}')
+        print(f'  after, warm cache                 {warm_ms:8.3f}')
+
+        before, after = load_before(), load_after(cache_dir)
+        print('blit ms per frame (background + 6 sprites)')
+        print(f'  before                            '
+              f'{_common.time_call(lambda: blit_frame(screen, before), repeat * 10):8.3f}')
+        print(f'  after                             '
+              f'{_common.time_call(lambda: blit_frame(screen, after), repeat * 10):8.3f}')
+        print('background blit ms')
+        print(f'  before (convert_alpha)            '
+              f'{_common.time_call(lambda: screen.blit(before["background"], (0, 0)), repeat * 10):8.3f}')
+        print(f'  after (convert)                   '
+              f'{_common.time_call(lambda: screen.blit(after["background"], (0, 0)), repeat * 10):8.3f}')
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = _common.argument_parser(__doc__)
+    parser.add_argument('--repeat', type=int, default=50, help='timed repetitions per measurement')
+    main(parser.parse_args().repeat)
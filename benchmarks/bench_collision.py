@@ -0,0 +1,64 @@
+"""
+Collision broadphase micro-benchmarks
+
+times CollisionWorld.query against an all-pairs NumPy test with thousands of enemies and projectiles,
+tests/test_collision.py checks that query finds exactly the pairs main.has_collided accepts
+
+usage: python benchmarks/bench_collision.py [--repeat N]
+"""
+import numpy as np
+
+import _common
+from collision import COLLISION_RADIUS, CollisionWorld
+
+# (enemies, projectiles)
+SCENARIOS = ((4, 1), (100, 10), (1_000, 100), (2_000, 2_000), (10_000, 1_000), (10_000, 10_000))
+
+
+class Bodies:
+    """
+    A minimal collision body holding fixed coordinates
+    """
+    def __init__(self, xs, ys):
+        self.xs = np.asarray(xs, dtype=np.float64)
+        self.ys = np.asarray(ys, dtype=np.float64)
+
+    def collision_positions(self) -> tuple:
+        return self.xs, self.ys
+
+
+def make_world(enemies: int, projectiles: int, seed: int) -> tuple:
+    rng = np.random.default_rng(seed)
+    world = CollisionWorld()
+    a = Bodies(rng.uniform(-20, 760, enemies), rng.uniform(0, 600, enemies))
+    b = Bodies(rng.uniform(0, 800, projectiles), rng.uniform(0, 600, projectiles))
+    world.register('a', a)
+    world.register('b', b)
+    return world, a, b
+
+
+def all_pairs(a: Bodies, b: Bodies) -> tuple:
+    dx = a.xs[:, None] - b.xs[None, :]
+    dy = a.ys[:, None] - b.ys[None, :]
+    idx_a, idx_b = np.nonzero(dx * dx + dy * dy < COLLISION_RADIUS * COLLISION_RADIUS)
+    order = np.lexsort((idx_a, idx_b))
+    return idx_a[order], idx_b[order]
+
+
+def main(repeat: int) -> None:
+    print(f'{"enemies":>8} {"shots":>6} {"pairs":>7} {"query ms":>9} {"all pairs ms":>13}')
+    for enemies, projectiles in SCENARIOS:
+        world, a, b = make_world(enemies, projectiles, 0)
+        pairs = len(world.query('a', 'b')[0])
+        query_ms = _common.time_call(lambda: world.query('a', 'b'), repeat, warm_up=1)
+        if enemies * projectiles <= 20_000_000:
+            brute = f'{_common.time_call(lambda: all_pairs(a, b), repeat, warm_up=1):>13.3f}'
+        else:
+            brute = f'{"skipped":>13}'
+        print(f'{enemies:>8} {projectiles:>6} {pairs:>7} {query_ms:>9.3f} {brute}')
+
+
+if __name__ == '__main__':
+    parser = _common.argument_parser(__doc__)
+    parser.add_argument('--repeat', type=int, default=20, help='timed queries per scenario')
+    main(parser.parse_args().repeat)
@@ -0,0 +1,68 @@
+"""
+Frame time of the enemy swarm against the number of enemies
+
+runs the enemy update and the batched draw on the dummy video driver and compares it with the old
+per-enemy loop (one bounds check, one collision test and one blit per enemy in Python)
+
+usage: python benchmarks/bench_enemy_swarm.py [--frames N]
+"""
+import random
+
+import _common
+import main
+
+ENEMY_COUNTS = (4, 100, 1_000, 10_000)
+
+
+def legacy_frame(enemy_x: list, enemy_y: list, state: dict, laser_x: float, laser_y: float, draw=True) -> None:
+    """
+    one frame of the list based swarm the vectorized Enemy replaced, kept here as the reference
+    """
+
+    for i in range(len(enemy_x)):
+        enemy_x[i] += state['change']
+        if enemy_x[i] <= 0:
+            state['change'] = main.ENEMY_X_MOVE
+            enemy_y[i] += main.ENEMY_Y_MOVE
+        elif enemy_x[i] >= main.SCREEN_BOUND:
+            state['change'] = -main.ENEMY_X_MOVE
+            enemy_y[i] += main.ENEMY_Y_MOVE
+        if main.has_collided(enemy_x[i], enemy_y[i], laser_x, laser_y):
+            enemy_x[i] = random.randint(*main.ENEMY_SPAWN_X)
+            enemy_y[i] = random.randint(*main.ENEMY_SPAWN_Y)
+        if draw:
+            main.screen.blit(main.assets.image('enemy1'), (enemy_x[i], enemy_y[i]))
+
+
+def main_bench(frames: int) -> None:
+    main.init_display()
+    print('mean ms per frame, update is movement + bounce + collision, frame adds the draw')
+    print(f'{"enemies":>8} {"update":>9} {"frame":>9} {"legacy update":>14} {"legacy frame":>13}')
+    for count in ENEMY_COUNTS:
+        random.seed(0)
+        enemy = main.Enemy(count)
+        player_laser = main.PlayerLaser(enemy.collisions)
+        score = main.Score()
+        enemy_x, enemy_y = enemy.enemy_x.tolist(), enemy.enemy_y.tolist()
+        state = {'change': main.ENEMY_X_MOVE}
+        laser = (0, main.INIT_PLAYER_Y)  # where the old single laser rested while not fired
+
+        def update():
+            enemy.enemy_movement(player_laser, score)
+
+        def frame():
+            enemy.enemy_movement(player_laser, score)
+            enemy.set_enemies(0.5)
+
+        update_ms = _common.time_call(update, frames, warm_up=1)
+        frame_ms = _common.time_call(frame, frames, warm_up=1)
+        legacy_update_ms = _common.time_call(lambda: legacy_frame(enemy_x, enemy_y, state, *laser, draw=False),
+                                             frames, warm_up=1)
+        legacy_frame_ms = _common.time_call(lambda: legacy_frame(enemy_x, enemy_y, state, *laser), frames, warm_up=1)
+        print(f'{count:>8} {update_ms:>9.3f} {frame_ms:>9.3f} {legacy_update_ms:>14.3f} {legacy_frame_ms:>13.3f}')
+
+
+if __name__ == '__main__':
+    parser = _common.argument_parser(__doc__)
+    parser.add_argument('--frames', type=int, default=100, help='frames timed per enemy count')
+    main_bench(parser.parse_args().frames)
@@ -0,0 +1,49 @@
+"""
+HUD text cost per frame
+
+compares rendering the score with font.render every frame (the old Score.show_score) against a HudField,
+for a score that changes on a kill only and for an FPS counter that changes almost every frame
+
+usage: python benchmarks/bench_hud.py [--frames N]
+"""
+import pygame
+
+import _common
+from hud import HudField
+
+KILL_EVERY = 120  # frames between score changes
+FPS_VALUES = (58, 59, 60, 61, 62)  # values a steady FPS counter flickers between
+
+
+def main(frames: int) -> None:
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    font = pygame.font.Font('freesansbold.ttf', 28)
+    score_field = HudField(font, 'Score : ', (10, 10))
+    fps_field = HudField(font, 'FPS : ', (620, 10))
+
+    def render_score(i):
+        screen.blit(font.render('Score : ' + str(i // KILL_EVERY), True, (255, 255, 255)), (10, 10))
+
+    def field_score(i):
+        score_field.set(i // KILL_EVERY)
+        score_field.draw(screen)
+
+    def render_fps(i):
+        screen.blit(font.render('FPS : ' + str(FPS_VALUES[i % 5]), True, (255, 255, 255)), (620, 10))
+
+    def field_fps(i):
+        fps_field.set(FPS_VALUES[i % 5])
+        fps_field.draw(screen)
+
+    print('ms per frame')
+    print(f'  score, font.render every frame    {_common.time_frames(render_score, frames):8.4f}')
+    print(f'  score, HudField                   {_common.time_frames(field_score, frames):8.4f}')
+    print(f'  fps, font.render every frame      {_common.time_frames(render_fps, frames):8.4f}')
+    print(f'  fps, HudField                     {_common.time_frames(field_fps, frames):8.4f}')
+
+
+if __name__ == '__main__':
+    parser = _common.argument_parser(__doc__)
+    parser.add_argument('--frames', type=int, default=20_000, help='frames timed per case')
+    main(parser.parse_args().frames)
@@ -0,0 +1,111 @@
+"""
+LAN game bandwidth, input to screen latency and consistency, with the server and the clients as local processes
+
+every scenario starts python main.py --server and a few python main.py --connect --autopilot clients on the
+dummy video driver over localhost, optionally dropping and delaying packets, and reports per client the
+snapshot traffic against full snapshots, the input to screen latency of the predicted player and of the
+server's confirmed result, and whether the client ended with exactly the server's final state
+
+usage: python benchmarks/bench_netplay.py [--ticks N] [--scenario NAME ...]
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+
+import _common
+
+# name: (clients, enemies, fire mode, packet loss percent, one way delay ms)
+SCENARIOS = {
+    'two_players': (2, 4, 'rapid', 0, 0),
+    'four_players_large_wave': (4, 200, 'spread', 0, 0),
+    'lossy_network': (2, 4, 'rapid', 5, 20),
+}
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_scenario(clients: int, enemies: int, fire_mode: str, loss: float, delay: float, ticks: int) -> tuple:
+    """
+    :return: tuple of (server stats, list of client stats, None for a client that failed)
+    """
+
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    port = free_port()
+    network = ['--net-loss', str(loss), '--net-delay', str(delay)]
+    with tempfile.TemporaryDirectory() as stats_dir:
+        server_stats = os.path.join(stats_dir, 'server.json')
+        server = subprocess.Popen(
+            [sys.executable, 'main.py', '--server', '--port', str(port), '--players', str(clients),
+             '--match-ticks', str(ticks), '--enemies', str(enemies), '--fire-mode', fire_mode,
+             '--net-stats', server_stats] + network, cwd=_common.ROOT, env=env, stdout=subprocess.DEVNULL)
+        client_stats = [os.path.join(stats_dir, f'client{i}.json') for i in range(clients)]
+        players = [subprocess.Popen(
+            [sys.executable, 'main.py', '--connect', f'127.0.0.1:{port}', '--autopilot', '--net-stats', path] + network,
+            cwd=_common.ROOT, env=env, stdout=subprocess.DEVNULL) for path in client_stats]
+        # a client that never joins would leave the server waiting for it
+        timeout = ticks / 120 + 30
+        for process in players + [server]:
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        results = []
+        for path in client_stats:
+            if os.path.exists(path):
+                with open(path) as file:
+                    results.append(json.load(file))
+            else:
+                results.append(None)
+        if not os.path.exists(server_stats):
+            return {'clients': [], 'final_tick': None, 'checksum': None}, results
+        with open(server_stats) as file:
+            return json.load(file), results
+
+
+def ms(value) -> str:
+    return f'{value:10.2f}' if value is not None else f'{"-":>10}'
+
+
+def main_bench(names: list, ticks: int) -> int:
+    failures = []
+    print(f'{"scenario":26}{"player":>7}{"KiB/s":>8}{"bytes":>8}{"full":>8}'
+          f'{"pred p50":>10}{"pred p95":>10}{"conf p50":>10}{"conf p95":>10}{"mispred":>9}  state')
+    for name in names:
+        server, clients = run_scenario(*SCENARIOS[name], ticks)
+        for error, count in server.get('send_errors', {}).items():
+            failures.append(f'{name}: {count} server packets failed to send: {error}')
+        for client in clients:
+            if client is None:
+                failures.append(f'{name}: a client did not finish')
+                continue
+            sent = next((sent for sent in reversed(server['clients']) if sent['slot'] == client['slot']), {})
+            matches = client['final_tick'] == server['final_tick'] and client['checksum'] == server['checksum']
+            if not matches:
+                failures.append(f'{name}: player {client["slot"] + 1} ended in a different state than the server')
+            predicted, confirmed = client['predicted_latency_ms'], client['confirmed_latency_ms']
+            print(f'{name:26}{client["slot"] + 1:7d}{client["down_bytes_per_second"] / 1024:8.2f}'
+                  f'{sent.get("snapshot_bytes", 0):8.1f}{sent.get("full_snapshot_bytes", 0):8.1f}'
+                  f'{ms(predicted["p50"])}{ms(predicted["p95"])}{ms(confirmed["p50"])}{ms(confirmed["p95"])}'
+                  f'{client["mispredictions"]:9d}  {"same" if matches else "DIFFERENT"}')
+    if failures:
+        print(f'\n{len(failures)} failure(s):')
+        for failure in failures:
+            print(f'  {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    parser = _common.argument_parser(__doc__)
+    parser.add_argument('--ticks', type=int, default=1200, help='server ticks every match lasts')
+    parser.add_argument('--scenario', nargs='+', choices=SCENARIOS, default=list(SCENARIOS),
+                        help='scenarios to run')
+    args = parser.parse_args()
+    sys.exit(main_bench(args.scenario, args.ticks))
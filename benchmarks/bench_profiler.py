@@ -0,0 +1,55 @@
+"""
+Cost of the frame profiler
+
+times the same seeded frames (two ticks and a render) with profiling off (NULL_PROFILER) and on,
+with and without the overlay
+
+usage: python benchmarks/bench_profiler.py [--frames N]
+"""
+import random
+import time
+
+import pygame
+
+import _common
+import frame_profiler
+import main
+
+TICKS_PER_FRAME = main.TICK_RATE // main.FPS
+
+
+def run(profiler, frames: int) -> float:
+    """
+    :return: mean milliseconds per frame
+    """
+
+    random.seed(0)
+    game = main.Game(profiler=profiler)
+    game.render(0.0)
+    start = time.perf_counter()
+    for _ in range(frames):
+        profiler.start_frame()
+        for _ in range(TICKS_PER_FRAME):
+            game.autopilot()
+            game.update()
+        game.render(0.5)
+        profiler.end_frame()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main_bench(frames: int) -> None:
+    main.init_display()
+    font = pygame.font.Font('freesansbold.ttf', 14)
+    cases = (('off', lambda: frame_profiler.NULL_PROFILER),
+             ('timing', lambda: frame_profiler.FrameProfiler()),
+             ('timing + overlay', lambda: frame_profiler.FrameProfiler(font=font)))
+    print('ms per frame')
+    for name, make in cases:
+        run(make(), frames // 10)  # warm up
+        print(f'  {name:<18}{run(make(), frames):8.4f}')
+
+
+if __name__ == '__main__':
+    parser = _common.argument_parser(__doc__)
+    parser.add_argument('--frames', type=int, default=3000, help='frames timed per case')
+    main_bench(parser.parse_args().frames)
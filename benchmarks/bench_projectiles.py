@@ -0,0 +1,135 @@
+"""
+Projectile pool with many live shots
+
+keeps the pool topped up to a target number of live shots and times one tick (spawn, move, cull, collision
+against a 100 enemy wave) plus the draw, next to the same tick done with one Python object per bullet,
+allocations are tracemalloc peaks, of the move and cull alone and of the whole tick, the pool arrays are
+allocated once up front and not counted, for the pool the tick peak is mostly the temporaries of the collision
+query (the shots form the grid, the enemies probe it), the objects find their hits with has_collided and
+allocate next to nothing
+
+usage: python benchmarks/bench_projectiles.py [--frames N]
+"""
+import random
+import tracemalloc
+
+import numpy as np
+
+import _common
+import main
+
+LIVE_SHOTS = (100, 1_000, 2_000)
+ENEMIES = 100
+
+
+class Bullet:
+    """
+    A bullet as its own object, the pattern the pool replaces
+    """
+    def __init__(self, x, y, vy):
+        self.x = x
+        self.y = y
+        self.vy = vy
+
+
+class PoolScenario:
+    def __init__(self, shots: int):
+        random.seed(0)
+        self.shots = shots
+        self.collisions = main.CollisionWorld()
+        self.enemy = main.Enemy(ENEMIES, self.collisions)
+        self.player_laser = main.PlayerLaser(self.collisions)
+        self.score = main.Score()
+        self.rng = np.random.default_rng(0)
+
+    def refill(self) -> None:
+        pool = self.player_laser.pool
+        missing = self.shots - pool.live_count()
+        if missing > 0:
+            pool.spawn(main.PLAYER_LASER, self.rng.uniform(0, 736, missing), main.INIT_PLAYER_Y,
+                       self.rng.uniform(-30, 30, missing))
+
+    def move(self) -> None:
+        self.player_laser.laser_movement(0)
+
+    def tick(self, draw: bool) -> None:
+        self.refill()
+        self.move()
+        self.enemy.enemy_movement(self.player_laser, self.score)
+        if draw:
+            self.player_laser.fire_player_laser(0.5)
+
+
+class ObjectScenario:
+    def __init__(self, shots: int):
+        random.seed(0)
+        self.shots = shots
+        self.bullets = []
+        self.enemy = main.Enemy(ENEMIES)
+
+    def refill(self) -> None:
+        while len(self.bullets) < self.shots:
+            self.bullets.append(Bullet(random.uniform(0, 736), main.INIT_PLAYER_Y, -main.LASER_PLAYER_MOVE))
+
+    def move(self) -> None:
+        alive = []
+        for bullet in self.bullets:
+            bullet.y += bullet.vy
+            if bullet.y > 0:
+                alive.append(bullet)
+        self.bullets = alive
+
+    def tick(self, draw: bool) -> None:
+        self.refill()
+        self.move()
+        enemies = list(zip(self.enemy.enemy_x.tolist(), self.enemy.enemy_y.tolist()))
+        hit = set()
+        for i, bullet in enumerate(self.bullets):
+            for x, y in enemies:
+                if main.has_collided(x, y, bullet.x, bullet.y):
+                    hit.add(i)
+                    break
+        if hit:
+            self.bullets = [bullet for i, bullet in enumerate(self.bullets) if i not in hit]
+        if draw:
+            image = main.assets.image('laser_player')
+            main.screen.blits([(image, (bullet.x + 25, bullet.y + 10)) for bullet in self.bullets], doreturn=False)
+
+
+def peak_kib(call) -> float:
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return peak
+
+
+def measure(scenario, frames: int) -> tuple:
+    """
+    :return: tuple of (tick ms, tick + draw ms, move peak KiB, tick peak KiB)
+    """
+
+    for _ in range(30):
+        scenario.tick(True)  # warm up and reach the target live count
+    tick_ms = _common.time_call(lambda: scenario.tick(False), frames)
+    frame_ms = _common.time_call(lambda: scenario.tick(True), frames)
+
+    scenario.refill()
+    move_peak = peak_kib(scenario.move)
+    return tick_ms, frame_ms, move_peak, peak_kib(lambda: scenario.tick(False))
+
+
+def main_bench(frames: int) -> None:
+    main.init_display()
+    print(f'{ENEMIES} enemies, ms per tick, tracemalloc peaks of the move and of one tick')
+    print(f'{"shots":>6} {"mode":>7} {"tick":>8} {"frame":>8} {"move KiB":>9} {"tick KiB":>9}')
+    for shots in LIVE_SHOTS:
+        for name, scenario in (('pool', PoolScenario(shots)), ('objects', ObjectScenario(shots))):
+            tick_ms, frame_ms, move_peak, tick_peak = measure(scenario, frames)
+            print(f'{shots:>6} {name:>7} {tick_ms:>8.3f} {frame_ms:>8.3f} {move_peak:>9.1f} {tick_peak:>9.1f}')
+
+
+if __name__ == '__main__':
+    parser = _common.argument_parser(__doc__)
+    parser.add_argument('--frames', type=int, default=100, help='ticks timed per scenario')
+    main_bench(parser.parse_args().frames)
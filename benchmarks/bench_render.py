@@ -0,0 +1,55 @@
+"""
+Dirty rectangle rendering against full redraw
+
+plays the same seeded autopilot game in both rendering modes on the dummy video driver and reports wall time
+and CPU time per rendered frame, tests/test_render.py checks that both modes leave identical pixels
+
+usage: python benchmarks/bench_render.py [--frames N]
+"""
+import random
+import time
+
+import pygame
+
+import _common
+import main
+
+ENEMY_COUNTS = (4, 100, 1_000)
+TICKS_PER_FRAME = main.TICK_RATE // main.FPS
+
+
+def play(enemy_count: int, full_redraw: bool, frames: int) -> tuple:
+    """
+    :return: tuple of (wall ms per frame, cpu ms per frame, final screen pixels)
+    """
+
+    random.seed(0)
+    game = main.Game(enemy_count, full_redraw)
+    game.render(0.0)
+    wall = cpu = 0.0
+    for _ in range(frames):
+        for _ in range(TICKS_PER_FRAME):
+            game.autopilot()
+            game.update()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        game.render(0.5)
+        wall += time.perf_counter() - wall_start
+        cpu += time.process_time() - cpu_start
+    return wall / frames * 1000, cpu / frames * 1000, pygame.image.tobytes(main.screen, 'RGB')
+
+
+def main_bench(frames: int) -> None:
+    main.init_display()
+    print('ms per rendered frame')
+    print(f'{"enemies":>8} {"full wall":>10} {"full cpu":>9} {"dirty wall":>11} {"dirty cpu":>10} {"speedup":>8}')
+    for count in ENEMY_COUNTS:
+        full_wall, full_cpu, _ = play(count, True, frames)
+        dirty_wall, dirty_cpu, _ = play(count, False, frames)
+        print(f'{count:>8} {full_wall:>10.3f} {full_cpu:>9.3f} {dirty_wall:>11.3f} {dirty_cpu:>10.3f} '
+              f'{full_wall / dirty_wall:>7.1f}x')
+
+
+if __name__ == '__main__':
+    parser = _common.argument_parser(__doc__)
+    parser.add_argument('--frames', type=int, default=300, help='frames rendered per mode')
+    main_bench(parser.parse_args().frames)
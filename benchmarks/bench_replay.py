@@ -0,0 +1,193 @@
+"""
+Deterministic replay benchmark suite
+
+plays recorded input scripts (benchmarks/replays/*.gwr) through Game on the dummy video driver with the
+random module seeded from the replay, so every run simulates exactly the same game, and reports frames per
+second, per frame latency percentiles and peak traced memory for every scenario, compared with the stored
+baseline (benchmarks/baseline.json)
+
+--check fails only when a replay ends in a different state than in the baseline, the final state does not
+depend on the machine, timing and memory regressions beyond --threshold are printed as warnings and only fail
+with --gate-timing. the committed baseline was timed on another machine, run --save-baseline locally before
+comparing timings
+
+usage: python benchmarks/bench_replay.py [--repeat N] [--save-baseline] [--check [--gate-timing]]
+                                         [--threshold PERCENT]
+       python benchmarks/bench_replay.py --write-replays
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import zlib
+
+import numpy as np
+
+import pygame
+
+import _common
+import main
+from replay import Replay
+
+REPLAY_DIR = os.path.join('benchmarks', 'replays')
+BASELINE_PATH = os.path.join('benchmarks', 'baseline.json')
+TICKS_PER_FRAME = main.TICK_RATE // main.FPS
+SCENARIOS = ('idle', 'constant_fire', 'spread_fire', 'large_wave', 'huge_wave')
+
+
+def sweep(replay: Replay, period: int) -> Replay:
+    """
+    holds fire for the whole replay and walks the player left and right every period ticks
+    """
+
+    replay.events.append((0, True, pygame.K_SPACE))
+    direction = pygame.K_RIGHT
+    for tick in range(0, replay.ticks, period):
+        replay.events.append((tick, True, direction))
+        replay.events.append((tick + period - 1, False, direction))
+        direction = pygame.K_LEFT if direction == pygame.K_RIGHT else pygame.K_RIGHT
+    return replay
+
+
+def make_replays() -> dict:
+    rate = main.TICK_RATE
+    return {
+        'idle': Replay(1, 4, 'single', rate, 10 * rate),
+        'constant_fire': sweep(Replay(2, 4, 'rapid', rate, 10 * rate), rate),
+        'spread_fire': sweep(Replay(3, 100, 'spread', rate, 10 * rate), rate),
+        'large_wave': sweep(Replay(4, 1_000, 'rapid', rate, 5 * rate), rate),
+        'huge_wave': sweep(Replay(5, 5_000, 'rapid', rate, 2 * rate), rate),
+    }
+
+
+def checksum(game: main.Game) -> str:
+    # fingerprint of the final state, a change means the simulation itself changed, not just its speed
+    state = np.concatenate((game.enemy.enemy_x, game.enemy.enemy_y,
+                            [game.player.player_x, game.score.total_score, game.player_laser.pool.live_count()]))
+    return f'{zlib.crc32(state.tobytes()):08x}'
+
+
+def play(replay: Replay, latencies=None) -> main.Game:
+    random.seed(replay.seed)
+    game = main.Game(replay.enemy_count, fire_mode=replay.fire_mode, replay=replay)
+    while game.ticks < replay.ticks:
+        start = time.perf_counter()
+        # the last frame runs only the ticks left, like Game.game_loop()
+        for _ in range(min(TICKS_PER_FRAME, replay.ticks - game.ticks)):
+            game.update()
+        game.render(0.5)
+        if latencies is not None:
+            latencies.append(time.perf_counter() - start)
+    return game
+
+
+def run_scenario(replay: Replay, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        latencies = []
+        game = play(replay, latencies)
+        runs.append(np.array(latencies) * 1000)
+    # every figure is the median over the runs, so a run disturbed by the rest of the machine moves none of them
+    fps = np.median([len(run) / run.sum() * 1000 for run in runs])
+    percentiles = np.median([np.percentile(run, (50, 95, 99)) for run in runs], axis=0)
+    tracemalloc.start()
+    memory_game = play(replay)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if checksum(memory_game) != checksum(game):
+        raise SystemExit('the same replay ended in two different states, the simulation is not deterministic')
+    return {
+        'frames': len(runs[0]),
+        'fps': round(float(fps), 1),
+        'p50_ms': round(float(percentiles[0]), 3),
+        'p95_ms': round(float(percentiles[1]), 3),
+        'p99_ms': round(float(percentiles[2]), 3),
+        'peak_kib': round(peak / 1024, 1),
+        'score': game.score.total_score,
+        'checksum': checksum(game),
+    }
+
+
+def compare(name: str, result: dict, baseline: dict, threshold: float) -> tuple:
+    """
+    prints a scenario against its baseline
+    :return: tuple of (list of state changes, list of timing and memory regressions)
+    """
+
+    changes, regressions = [], []
+    print(f'{name:<14}{result["fps"]:>9.1f}{result["p50_ms"]:>9.3f}{result["p95_ms"]:>9.3f}'
+          f'{result["p99_ms"]:>9.3f}{result["peak_kib"]:>10.1f}{result["score"]:>7}  {result["checksum"]}')
+    if baseline is None:
+        print(f'{"":<14}no baseline')
+        return changes, regressions
+    deltas = []
+    # higher is better for fps, lower is better for the rest, p99 is too noisy on a shared machine to fail on
+    for key, sign, checked in (('fps', 1, True), ('p50_ms', -1, True), ('p99_ms', -1, False),
+                               ('peak_kib', -1, True)):
+        change = (result[key] - baseline[key]) / baseline[key] * 100 if baseline[key] else 0.0
+        deltas.append(f'{key} {change:+.1f}%')
+        if checked and sign * change < -threshold:
+            regressions.append(f'{name}: {key} {baseline[key]} -> {result[key]}')
+    if result['checksum'] != baseline['checksum']:
+        changes.append(f'{name}: final state changed (score {baseline["score"]} -> {result["score"]})')
+        deltas.append('STATE CHANGED')
+    print(f'{"":<14}vs baseline: ' + ', '.join(deltas))
+    return changes, regressions
+
+
+def main_bench(repeat: int, save_baseline: bool, check: bool, threshold: float, gate_timing: bool) -> int:
+    main.init_display()
+    replays = {name: Replay.load(os.path.join(REPLAY_DIR, name + '.gwr')) for name in SCENARIOS}
+    for name, replay in replays.items():
+        if replay.tick_rate != main.TICK_RATE:
+            raise SystemExit(f'{name} was recorded at {replay.tick_rate} ticks per second, not {main.TICK_RATE}')
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as file:
+            baseline = json.load(file)
+
+    print(f'{"scenario":<14}{"fps":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"peak KiB":>10}{"score":>7}  state')
+    results, changes, regressions = {}, [], []
+    for name, replay in replays.items():
+        results[name] = run_scenario(replay, repeat)
+        scenario_changes, scenario_regressions = compare(name, results[name], baseline.get(name), threshold)
+        changes += scenario_changes
+        regressions += scenario_regressions
+
+    if save_baseline:
+        with open(BASELINE_PATH, 'w') as file:
+            json.dump(results, file, indent=2)
+            file.write('\n')
+        print(f'baseline written to {BASELINE_PATH}')
+        return 0
+    if regressions:
+        print(f'\n{len(regressions)} timing or memory regression(s) beyond {threshold}%'
+              f'{"" if gate_timing else ", not gated, timings are only comparable to a baseline saved here"}:')
+        for regression in regressions:
+            print('  ' + regression)
+    if changes:
+        print(f'\n{len(changes)} replay(s) ended in a different state:')
+        for change in changes:
+            print('  ' + change)
+    return 1 if check and (changes or (gate_timing and regressions)) else 0
+
+
+if __name__ == '__main__':
+    parser = _common.argument_parser(__doc__)
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per scenario, the medians are kept')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--check', action='store_true', help='exit with status 1 when a replay ends in another state')
+    parser.add_argument('--gate-timing', action='store_true',
+                        help='with --check, also exit with status 1 on a timing or memory regression')
+    parser.add_argument('--threshold', type=float, default=25.0, help='allowed slowdown in percent')
+    parser.add_argument('--write-replays', action='store_true', help='regenerate the scenario replay files')
+    args = parser.parse_args()
+    if args.write_replays:
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        for scenario, scenario_replay in make_replays().items():
+            scenario_replay.save(os.path.join(REPLAY_DIR, scenario + '.gwr'))
+        print(f'replays written to {REPLAY_DIR}')
+    else:
+        sys.exit(main_bench(args.repeat, args.save_baseline, args.check, args.threshold, args.gate_timing))
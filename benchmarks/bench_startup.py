@@ -0,0 +1,73 @@
+"""
+Startup time of the game
+
+times python main.py --startup-time in fresh processes, cold with the asset disk cache removed and warm with it
+filled, and fails when the median misses STARTUP_TARGETS, tests/test_startup.py checks that importing main has
+no side effects
+
+usage: python benchmarks/bench_startup.py [--runs N]
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+import _common
+
+CACHE_DIR = os.path.join(_common.ROOT, '.asset_cache')
+# milliseconds from the start of main() until each point, and for the whole process including the imports
+STARTUP_TARGETS = {
+    'cold': {'window': 50, 'assets': 150, 'first frame': 200, 'process': 1000},
+    'warm': {'window': 50, 'assets': 100, 'first frame': 150, 'process': 800},
+}
+
+
+def environment() -> dict:
+    # _common already chose the dummy video driver unless another one was set
+    env = dict(os.environ)
+    env['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+    return env
+
+
+def startup(cold: bool) -> dict:
+    if cold:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, 'main.py', '--startup-time'], cwd=_common.ROOT, env=environment(),
+                            capture_output=True, text=True, check=True).stdout
+    process_ms = (time.perf_counter() - start) * 1000
+    # window: X ms  assets: Y ms  first frame: Z ms
+    times = {'process': process_ms}
+    for part in output.strip().splitlines()[-1].split('  '):
+        name, value = part.split(': ')
+        times[name] = float(value.split()[0])
+    return times
+
+
+def main(runs: int) -> None:
+    failures = []
+    print(f'{"startup":8}{"phase":>14}{"median ms":>12}{"max ms":>10}{"target":>10}')
+    for kind in ('cold', 'warm'):
+        if kind == 'warm':
+            startup(cold=False)  # fills the cache
+        samples = [startup(cold=kind == 'cold') for _ in range(runs)]
+        for phase, target in STARTUP_TARGETS[kind].items():
+            values = [sample[phase] for sample in samples]
+            median = statistics.median(values)
+            print(f'{kind:8}{phase:>14}{median:12.1f}{max(values):10.1f}{target:10d}')
+            if median > target:
+                failures.append(f'{kind} {phase}: {median:.1f} ms > {target} ms')
+
+    if failures:
+        print(f'\n{len(failures)} failure(s):')
+        for failure in failures:
+            print(f'  {failure}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = _common.argument_parser(__doc__)
+    parser.add_argument('--runs', type=int, default=5, help='processes started per measurement')
+    main(parser.parse_args().runs)
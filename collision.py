@@ -0,0 +1,131 @@
+import numpy as np
+
+# two bodies collide when their distance is below this radius (in pixels)
+COLLISION_RADIUS = 50
+
+# cell keys pack the two cell coordinates in one int64, cell coordinates must stay within +-GRID_STRIDE / 2
+GRID_STRIDE = 1 << 20
+
+# up to this many candidate pairs (bodies in a times bodies in b) testing every pair directly beats building the grid
+BRUTE_FORCE_PAIRS = 8192
+
+# the 3x3 block of cells around a probe, with cell size >= radius every colliding pair is inside it
+NEIGHBOUR_X = np.array([-1, -1, -1, 0, 0, 0, 1, 1, 1], dtype=np.int64)
+NEIGHBOUR_Y = np.array([-1, 0, 1, -1, 0, 1, -1, 0, 1], dtype=np.int64)
+
+# layer names used by the game
+ENEMY_LAYER = 'enemy'
+PLAYER_LASER_LAYER = 'player_laser'
+
+
+def first_hits(idx_a: np.ndarray, idx_b: np.ndarray) -> tuple:
+    """
+    reduces hit pairs so every body takes part in at most one hit
+    each b keeps its first pair, then each a keeps the first b that reached it
+    :param idx_a: indices into layer a, as returned by CollisionWorld.query
+    :param idx_b: indices into layer b, sorted ascending
+    :return: tuple of (idx_a, idx_b) arrays
+    """
+
+    if not idx_b.size:
+        return idx_a, idx_b
+    _, first_b = np.unique(idx_b, return_index=True)
+    idx_a, idx_b = idx_a[first_b], idx_b[first_b]
+    _, first_a = np.unique(idx_a, return_index=True)
+    first_a.sort()
+    return idx_a[first_a], idx_b[first_a]
+
+
+class CollisionWorld:
+    """
+    A class to find every colliding pair between two layers of bodies
+    the larger layer is hashed into a uniform grid every query, then each body of the other layer
+    only tests the bodies in its 3x3 block of cells, the narrowphase compares squared distances
+    small layers skip the grid and compare every pair, a handful of enemies against a few shots is the common case
+    ...
+    Attributes
+    ----------
+    radius : float      collision radius
+    cell_size : float   side of a grid cell, never smaller than the radius
+    layers : dict       maps a layer name to the registered bodies
+
+    Methods
+    -------
+    register(layer, body) -> None : adds a body to a layer, the body has to implement collision_positions()
+    unregister(layer, body) -> None :   removes a body from a layer
+    positions(layer) -> tuple : the concatenated x and y coordinates of every body in the layer
+    query(layer_a, layer_b) -> tuple : every pair (index in layer a, index in layer b) closer than the radius
+    all_pairs(ax, ay, bx, by) -> tuple :    query() without the grid, for up to BRUTE_FORCE_PAIRS pairs
+    """
+    def __init__(self, radius=COLLISION_RADIUS, cell_size=None):
+        self.radius = radius
+        self.cell_size = max(cell_size or radius, radius)
+        self.layers = {}
+
+    def register(self, layer: str, body) -> None:
+        self.layers.setdefault(layer, []).append(body)
+
+    def unregister(self, layer: str, body) -> None:
+        self.layers[layer].remove(body)
+
+    def positions(self, layer: str) -> tuple:
+        bodies = self.layers.get(layer, [])
+        if not bodies:
+            return np.empty(0), np.empty(0)
+        if len(bodies) == 1:
+            return bodies[0].collision_positions()
+        xs, ys = zip(*(body.collision_positions() for body in bodies))
+        return np.concatenate(xs), np.concatenate(ys)
+
+    def cells(self, xs: np.ndarray, ys: np.ndarray) -> tuple:
+        return (np.floor_divide(xs, self.cell_size).astype(np.int64),
+                np.floor_divide(ys, self.cell_size).astype(np.int64))
+
+    def query(self, layer_a: str, layer_b: str) -> tuple:
+        ax, ay = self.positions(layer_a)
+        bx, by = self.positions(layer_b)
+        empty = np.empty(0, dtype=np.int64)
+        if not len(ax) or not len(bx):
+            return empty, empty
+        if len(ax) * len(bx) <= BRUTE_FORCE_PAIRS:
+            return self.all_pairs(ax, ay, bx, by)
+
+        # broadphase, the larger layer sorted by cell key forms the grid and the smaller one probes it,
+        # the probe arrays hold 9 entries per probing body, so probing with a few enemies keeps them small
+        swap = len(bx) > len(ax)
+        grid_x, grid_y, probe_x, probe_y = (bx, by, ax, ay) if swap else (ax, ay, bx, by)
+        cell_x, cell_y = self.cells(grid_x, grid_y)
+        keys = cell_x * GRID_STRIDE + cell_y
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+
+        # every probing body looks up the 9 cells around it, a cell is a [lo, hi) slice of the sorted keys
+        cell_x, cell_y = self.cells(probe_x, probe_y)
+        probes = ((cell_x[:, None] + NEIGHBOUR_X) * GRID_STRIDE + cell_y[:, None] + NEIGHBOUR_Y).ravel()
+        lo = np.searchsorted(keys, probes, side='left')
+        counts = np.searchsorted(keys, probes, side='right') - lo
+        total = int(counts.sum())
+        if not total:
+            return empty, empty
+
+        # expand each slice into candidate pairs
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        idx_grid = order[starts + np.arange(total)]
+        idx_probe = np.repeat(np.arange(len(probes)) // len(NEIGHBOUR_X), counts)
+
+        # narrowphase, no sqrt needed to compare a distance against the radius
+        dx = grid_x[idx_grid] - probe_x[idx_probe]
+        dy = grid_y[idx_grid] - probe_y[idx_probe]
+        hit = dx * dx + dy * dy < self.radius * self.radius
+        idx_a, idx_b = (idx_probe[hit], idx_grid[hit]) if swap else (idx_grid[hit], idx_probe[hit])
+
+        # pairs come out sorted by the b index, then by the a index
+        pair_order = np.lexsort((idx_a, idx_b))
+        return idx_a[pair_order], idx_b[pair_order]
+
+    def all_pairs(self, ax: np.ndarray, ay: np.ndarray, bx: np.ndarray, by: np.ndarray) -> tuple:
+        # one row per body of layer b, so nonzero() yields the pairs sorted by the b index, then by the a index
+        dx = bx[:, None] - ax
+        dy = by[:, None] - ay
+        idx_b, idx_a = np.nonzero(dx * dx + dy * dy < self.radius * self.radius)
+        return idx_a, idx_b
@@ -0,0 +1,169 @@
+import cProfile
+import csv
+import json
+import time
+
+import numpy as np
+import pygame
+
+# the phases of a frame in the order they run, the simulation phases add up over every tick of the frame
+PHASES = ('events', 'player_movement', 'laser_movement', 'enemy_movement', 'enemy_collision',
+          'background', 'player_blit', 'laser_blit', 'enemy_blit', 'show_score', 'overlay', 'display_update')
+(EVENTS, PLAYER_MOVEMENT, LASER_MOVEMENT, ENEMY_MOVEMENT, ENEMY_COLLISION,
+ BACKGROUND, PLAYER_BLIT, LASER_BLIT, ENEMY_BLIT, SHOW_SCORE, OVERLAY, DISPLAY_UPDATE) = range(len(PHASES))
+
+PROFILE_FRAMES = 1024  # frames kept in the ring buffer
+OVERLAY_REFRESH = 30  # frames between two overlay refreshes
+OVERLAY_POSITION = (560, 50)
+OVERLAY_BACKGROUND = (0, 0, 0, 160)
+
+
+class NullProfiler:
+    """
+    A class standing in for FrameProfiler when profiling is off, every method does nothing
+    """
+    def start_frame(self) -> None:
+        pass
+
+    def lap(self, phase: int) -> None:
+        pass
+
+    def end_frame(self) -> None:
+        pass
+
+    def draw(self, screen, clock, target_fps) -> list:
+        return []
+
+    def close(self) -> None:
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class FrameProfiler:
+    """
+    A class to time every phase of a frame into a fixed size ring buffer
+    ...
+    Attributes
+    ----------
+    samples : ndarray of float  seconds spent in every phase, one row per frame
+    frames : int    number of frames recorded so far, the ring buffer holds the last PROFILE_FRAMES of them
+    current : list  seconds spent in every phase in the frame being recorded
+    last : float    perf_counter() at the previous lap
+    font : pygame Font  font of the overlay, None hides the overlay
+    overlay : Surface   the rendered overlay, refreshed every OVERLAY_REFRESH frames
+    dump_path : str     .csv or .json file the samples are written to on close, None skips the dump
+    cprofile_window : tuple     (first frame, end frame) to run cProfile over, None disables it
+    cprofile_path : str     file the cProfile stats are written to
+    cprofile : cProfile.Profile     the running profile, None outside the window
+
+    Methods
+    -------
+    start_frame() -> None : starts timing a frame
+    lap(phase) -> None :    adds the time since the previous lap to the phase
+    end_frame() -> None :   stores the frame in the ring buffer
+    recorded() -> ndarray : the recorded frames, oldest first
+    summary() -> dict :     p50, p99 and mean milliseconds of every phase and of the whole frame
+    draw(screen, clock, target_fps) -> list :   draws the overlay, returns the areas drawn
+    dump(path) -> None :    writes the recorded frames as CSV or JSON depending on the extension
+    close() -> None :   stops a running cProfile capture and writes the dump
+    """
+    def __init__(self, font=None, dump_path=None, cprofile_window=None, cprofile_path='frames.prof',
+                 capacity=PROFILE_FRAMES):
+        self.samples = np.zeros((capacity, len(PHASES)))
+        self.frames = 0
+        self.current = [0.0] * len(PHASES)
+        self.last = 0.0
+        self.font = font
+        self.overlay = None
+        self.dump_path = dump_path
+        self.cprofile_window = cprofile_window
+        self.cprofile_path = cprofile_path
+        self.cprofile = None
+
+    def start_frame(self) -> None:
+        if self.cprofile_window is not None and self.frames == self.cprofile_window[0]:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.last = time.perf_counter()
+
+    def lap(self, phase: int) -> None:
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self) -> None:
+        self.samples[self.frames % len(self.samples)] = self.current
+        self.current = [0.0] * len(PHASES)
+        self.frames += 1
+        if self.cprofile is not None and self.frames == self.cprofile_window[1]:
+            self.stop_cprofile()
+
+    def stop_cprofile(self) -> None:
+        self.cprofile.disable()
+        self.cprofile.dump_stats(self.cprofile_path)
+        self.cprofile = None
+
+    def recorded(self) -> np.ndarray:
+        capacity = len(self.samples)
+        if self.frames <= capacity:
+            return self.samples[:self.frames]
+        return np.roll(self.samples, -(self.frames % capacity), axis=0)
+
+    def summary(self) -> dict:
+        recorded = self.recorded() * 1000
+        if not len(recorded):
+            return {}
+        columns = dict(zip(PHASES, recorded.T))
+        columns['frame'] = recorded.sum(axis=1)
+        return {name: {'p50': float(np.percentile(values, 50)), 'p99': float(np.percentile(values, 99)),
+                       'mean': float(values.mean())} for name, values in columns.items()}
+
+    def render_overlay(self, clock, target_fps) -> pygame.Surface:
+        summary = self.summary()
+        rows = [('ms', 'p50', 'p99')]
+        rows += [(name, f'{stats["p50"]:.3f}', f'{stats["p99"]:.3f}') for name, stats in summary.items()]
+        # cells are rendered one by one so the columns line up whatever the font
+        cells = [[self.font.render(text, True, (255, 255, 255)) for text in row] for row in rows]
+        widths = [max(row[column].get_width() for row in cells) + 12 for column in range(3)]
+        height = self.font.get_linesize()
+        title = self.font.render(f'FPS {clock.get_fps():.1f} / {target_fps}', True, (255, 255, 255))
+        overlay = pygame.Surface((max(sum(widths), title.get_width()) + 8, height * (len(rows) + 1) + 8),
+                                 pygame.SRCALPHA)
+        overlay.fill(OVERLAY_BACKGROUND)
+        overlay.blit(title, (4, 4))
+        for i, row in enumerate(cells, start=1):
+            y = 4 + i * height
+            overlay.blit(row[0], (4, y))
+            # the numbers are right aligned
+            overlay.blit(row[1], (4 + widths[0] + widths[1] - row[1].get_width(), y))
+            overlay.blit(row[2], (4 + sum(widths) - row[2].get_width(), y))
+        return overlay
+
+    def draw(self, screen, clock, target_fps) -> list:
+        if self.font is None:
+            return []
+        if self.overlay is None or self.frames % OVERLAY_REFRESH == 0:
+            self.overlay = self.render_overlay(clock, target_fps)
+        return [screen.blit(self.overlay, OVERLAY_POSITION)]
+
+    def dump(self, path: str) -> None:
+        recorded = self.recorded() * 1000
+        first = self.frames - len(recorded)
+        if path.endswith('.json'):
+            with open(path, 'w') as file:
+                json.dump({'unit': 'ms', 'phases': list(PHASES), 'first_frame': first,
+                           'summary': self.summary(), 'frames': recorded.round(4).tolist()}, file)
+        else:
+            with open(path, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(('frame',) + PHASES + ('total',))
+                for i, row in enumerate(recorded):
+                    writer.writerow([first + i] + [f'{value:.4f}' for value in row] + [f'{row.sum():.4f}'])
+
+    def close(self) -> None:
+        if self.cprofile is not None:
+            self.stop_cprofile()
+        if self.dump_path is not None:
+            self.dump(self.dump_path)
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+
+import pygame
+
+DIGITS = '0123456789'
+HUD_COLOR = (255, 255, 255)
+HUD_CACHE_SIZE = 16  # rendered values kept per field
+
+# one glyph atlas per (font, color), shared by every field using them
+glyph_atlases = {}
+
+
+class GlyphAtlas:
+    """
+    A class to hold characters rendered once, so numbers are built by blitting glyphs instead of font rendering
+    ...
+    Attributes
+    ----------
+    font : pygame Font
+    color : tuple   color of the glyphs
+    glyphs : dict   maps a character to its rendered surface
+    height : int    height shared by every glyph
+
+    Methods
+    -------
+    render(text) -> Surface :   composes text out of the glyphs, characters missing from the atlas are rendered
+                                once and added to it
+    """
+    def __init__(self, font: pygame.font.Font, color=HUD_COLOR, chars=DIGITS + '-.'):
+        self.font = font
+        self.color = color
+        self.glyphs = {}
+        self.height = font.get_height()
+        for char in chars:
+            self.glyph(char)
+
+    def glyph(self, char: str) -> pygame.Surface:
+        surface = self.glyphs.get(char)
+        if surface is None:
+            surface = self.glyphs[char] = self.font.render(char, True, self.color)
+        return surface
+
+    def render(self, text: str, prefix=None) -> pygame.Surface:
+        glyphs = [self.glyph(char) for char in text]
+        width = sum(glyph.get_width() for glyph in glyphs)
+        if prefix is not None:
+            width += prefix.get_width()
+            glyphs.insert(0, prefix)
+        surface = pygame.Surface((width, self.height), pygame.SRCALPHA)
+        x = 0
+        for glyph in glyphs:
+            # the glyphs never overlap, so MAX copies their pixels onto the transparent surface without blending
+            surface.blit(glyph, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += glyph.get_width()
+        return surface
+
+
+def glyph_atlas(font: pygame.font.Font, color=HUD_COLOR) -> GlyphAtlas:
+    """
+    returns the shared glyph atlas of the font and color, building it on the first call
+    :param font: pygame Font
+    :param color: color of the glyphs
+    :return: GlyphAtlas
+    """
+
+    atlas = glyph_atlases.get((font, color))
+    if atlas is None:
+        atlas = glyph_atlases[(font, color)] = GlyphAtlas(font, color)
+    return atlas
+
+
+class HudField:
+    """
+    A class to represent one live HUD readout such as the score, lives, wave or FPS counter
+    the label is rendered once, the value only when it changes, and the last rendered values are kept
+    in a bounded cache so a readout that flips between a few values never renders again
+    ...
+    Attributes
+    ----------
+    label : str     static text drawn before the value
+    position : tuple    top left corner of the field
+    glyphs : GlyphAtlas     glyphs the value is built from
+    label_surface : Surface     the label rendered once
+    value : object  value currently shown, None before the first set
+    surface : Surface   label and value composed together
+    cache : OrderedDict     recently rendered surfaces by value text, least recently used first
+    cache_size : int    most surfaces kept in the cache
+
+    Methods
+    -------
+    set(value) -> bool :    changes the shown value, returns True when the surface had to change
+    draw(screen) -> Rect :  draws the field, returns the area drawn
+    """
+    def __init__(self, font: pygame.font.Font, label: str, position: tuple, color=HUD_COLOR,
+                 cache_size=HUD_CACHE_SIZE):
+        self.label = label
+        self.position = position
+        self.glyphs = glyph_atlas(font, color)
+        self.label_surface = font.render(label, True, color)
+        self.value = None
+        self.surface = self.label_surface
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+    def set(self, value) -> bool:
+        if value == self.value:
+            return False
+        self.value = value
+        text = str(value)
+        surface = self.cache.get(text)
+        if surface is None:
+            surface = self.cache[text] = self.glyphs.render(text, self.label_surface)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(text)
+        self.surface = surface
+        return True
+
+    def draw(self, screen: pygame.Surface) -> pygame.Rect:
+        return screen.blit(self.surface, self.position)
@@ -0,0 +1,595 @@
+import json
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+from asset_manager import AssetManager
+from collision import CollisionWorld
+from hud import HudField
+from main import (ENEMY_COUNT, FPS, HUD_FONT, INIT_PLAYER_Y, MAX_FRAME_TIME, PLAYER_LASER, PLAYER_MOVE,
+                  PROJECTILE_TYPES, TICK_RATE, TICK_TIME, Enemy, Player, PlayerLaser, Score, lerp)
+from netplay import (HELLO, INPUT_FIRE, INPUT_LEFT, INPUT_REDUNDANCY, INPUT_RIGHT, INTERPOLATION_DELAY,
+                     MAX_PLAYERS, MSG_BYE, MSG_HELLO, MSG_INPUT, MSG_SNAPSHOT, MSG_WELCOME, NET_MAGIC,
+                     NET_TIMEOUT, NO_BASELINE, POSITION_SCALE, SNAPSHOT_HISTORY, SNAPSHOT_INTERVAL, WELCOME,
+                     NetLink, Peer, decode_input, decode_snapshot, dequantize, encode_input, encode_snapshot,
+                     percentiles_ms, quantize, resize, state_checksum)
+
+NET_KEYS = {pygame.K_a: INPUT_LEFT, pygame.K_LEFT: INPUT_LEFT, pygame.K_d: INPUT_RIGHT, pygame.K_RIGHT: INPUT_RIGHT,
+            pygame.K_SPACE: INPUT_FIRE}
+NET_SNAP_DISTANCE = 100  # px, a move longer than this between two snapshots is a respawn and is not interpolated
+NET_FAREWELLS = 3  # copies of the final snapshot and of the goodbye, so a lost packet doesn't leave a client waiting
+LOBBY_SNAPSHOT_TIME = 0.25  # seconds between the snapshots sent while the server waits for players
+# inputs the client keeps for replaying on top of a snapshot, the server drops anything older long before
+MAX_PENDING_INPUTS = TICK_RATE // 2
+AUTOPILOT_FIRE_TICKS = TICK_RATE // 4  # the network autopilot presses and releases fire at this interval
+
+
+def apply_input(bits: int, player, player_laser=None) -> None:
+    """
+    applies the keys held during one tick of a LAN game, where INPUT_* bits replace the key events
+    :param bits: INPUT_* bits
+    :param player: Player
+    :param player_laser: PlayerLaser, None when only the movement is applied
+    """
+
+    player.player_x_change = (bool(bits & INPUT_RIGHT) - bool(bits & INPUT_LEFT)) * PLAYER_MOVE
+    if player_laser is None:
+        return
+    if bits & INPUT_FIRE and not player_laser.trigger:
+        player_laser.pull_trigger(player.player_x)
+    elif not bits & INPUT_FIRE and player_laser.trigger:
+        player_laser.release_trigger()
+
+
+def interpolate_positions(previous_x, previous_y, x, y, fraction: float) -> tuple:
+    """
+    interpolates quantized positions between two snapshots
+    an element that was free in the previous snapshot (y = 0) or jumped further than NET_SNAP_DISTANCE
+    is drawn at its newer position
+    :param previous_x: x coordinates in the older snapshot
+    :param previous_y: y coordinates in the older snapshot
+    :param x: x coordinates in the newer snapshot
+    :param y: y coordinates in the newer snapshot
+    :param fraction: position of the render time between the two snapshots, in [0, 1]
+    :return: tuple of (x, y) arrays in pixels
+    """
+
+    previous_x, previous_y = resize(previous_x, len(x)), resize(previous_y, len(y))
+    snap = (previous_y == 0) | (np.abs(x - previous_x) + np.abs(y - previous_y) > NET_SNAP_DISTANCE * POSITION_SCALE)
+    xs, ys = lerp(previous_x, x, fraction), lerp(previous_y, y, fraction)
+    xs[snap], ys[snap] = x[snap], y[snap]
+    return dequantize(xs), dequantize(ys)
+
+
+class ServerGame:
+    """
+    A class to host a LAN game, it runs the only real simulation of the match
+    every tick applies one input of each client to its player and steps the shared wave, every SNAPSHOT_INTERVAL
+    ticks each client is sent the state delta-compressed against the newest snapshot it acknowledged
+    ...
+    Attributes
+    ----------
+    link : NetLink  the server socket
+    collisions : CollisionWorld
+    enemy : Enemy   the wave shared by every player
+    players : list  Player of every slot
+    player_lasers : list    PlayerLaser of every slot, registered in the player laser layer in slot order
+    scores : list   Score of every slot
+    peers : dict    Peer of every connected client by address
+    departed : list     Peer of every client that left, kept for the stats
+    snapshots : dict    the newest states by tick, the baselines of the deltas
+    min_players : int   clients to wait for before the first tick
+    ticks : int     server tick, the lobby advances it by SNAPSHOT_INTERVAL per snapshot without simulating
+                    so every snapshot has its own tick
+    start_tick : int    tick the match started at
+    seconds : float     duration of the match
+    running : bool
+
+    Methods
+    -------
+    handle_packet(data, address) -> None :  applies one packet of a client
+    join(address) -> Peer :     gives a new client a free slot, None when the game is full
+    leave(peer) -> None :   frees the slot of a client
+    update() -> None :  advances the match by exactly one fixed tick
+    snapshot() -> dict :    the current state as SNAPSHOT_FIELDS
+    send_snapshots() -> None :  stores the current state and sends it to every client
+    wait_for_players() -> None :    answers packets until min_players clients have joined, the wave stands still
+    run(match_ticks) -> None :  runs the match in real time, until match_ticks or until every client left
+    finish() -> None :  sends every client the final state and says goodbye
+    stats() -> dict :   bandwidth of every client and the final state
+    report(path) -> None :  prints the stats and writes them to a JSON file when a path is given
+    """
+    def __init__(self, link: NetLink, enemy_count=ENEMY_COUNT, fire_mode='single', min_players=1):
+        self.link = link
+        self.collisions = CollisionWorld()
+        self.players = [Player() for _ in range(MAX_PLAYERS)]
+        self.player_lasers = [PlayerLaser(self.collisions, fire_mode) for _ in range(MAX_PLAYERS)]
+        self.scores = [Score() for _ in range(MAX_PLAYERS)]
+        self.enemy = Enemy(enemy_count, self.collisions)
+        self.peers = {}
+        self.departed = []
+        self.snapshots = {}
+        self.min_players = min_players
+        self.ticks = 0
+        self.start_tick = 0
+        self.seconds = 0.0
+        self.running = True
+
+    def handle_packet(self, data: bytes, address: tuple) -> None:
+        peer = self.peers.get(address)
+        if data[0] == MSG_HELLO:
+            if len(data) != HELLO.size or HELLO.unpack(data)[1] != NET_MAGIC:
+                return
+            if peer is None:
+                peer = self.join(address)
+                if peer is None:
+                    self.link.send(bytes([MSG_BYE]), address)
+                    return
+            # a repeated hello means the welcome was lost
+            self.link.send(WELCOME.pack(MSG_WELCOME, peer.slot, TICK_RATE, SNAPSHOT_INTERVAL, self.ticks), address)
+            return
+        if peer is None:
+            return
+        peer.last_heard = time.perf_counter()
+        if data[0] == MSG_INPUT:
+            try:
+                ack, seq, inputs = decode_input(data)
+            except ValueError:
+                # anyone on the LAN can send to the port, a broken packet is dropped
+                return
+            if ack != NO_BASELINE and (peer.acked == NO_BASELINE or ack > peer.acked):
+                peer.acked = ack
+            peer.add_inputs(seq, inputs)
+        elif data[0] == MSG_BYE:
+            self.leave(peer)
+
+    def join(self, address: tuple) -> Peer:
+        taken = {peer.slot for peer in self.peers.values()}
+        free = [slot for slot in range(MAX_PLAYERS) if slot not in taken]
+        if not free:
+            return None
+        slot = free[0]
+        self.players[slot] = Player()
+        self.scores[slot] = Score()
+        peer = self.peers[address] = Peer(address, slot)
+        return peer
+
+    def leave(self, peer: Peer) -> None:
+        del self.peers[peer.address]
+        self.departed.append(peer)
+        player_laser = self.player_lasers[peer.slot]
+        player_laser.release_trigger()
+        player_laser.pool.kill(player_laser.pool.live_slots())
+        self.players[peer.slot].player_x_change = 0
+
+    def update(self) -> None:
+        for peer in sorted(self.peers.values(), key=lambda peer: peer.slot):
+            apply_input(peer.next_bits(), self.players[peer.slot], self.player_lasers[peer.slot])
+        for player, player_laser in zip(self.players, self.player_lasers):
+            player.player_movement()
+            player_laser.laser_movement(player.player_x)
+        self.enemy.move_enemies()
+        self.enemy.team_collisions(self.player_lasers, self.scores)
+        self.ticks += 1
+
+    def snapshot(self) -> dict:
+        active = np.zeros(MAX_PLAYERS, dtype=np.int32)
+        applied = np.zeros(MAX_PLAYERS, dtype=np.int32)
+        for peer in self.peers.values():
+            active[peer.slot] = 1
+            applied[peer.slot] = peer.applied
+        state = {
+            'enemy_x': quantize(self.enemy.enemy_x),
+            'enemy_y': quantize(self.enemy.enemy_y),
+            'player_active': active,
+            'player_x': quantize([player.player_x for player in self.players]),
+            'player_score': np.array([score.total_score for score in self.scores], dtype=np.int32),
+            'player_input': applied,
+        }
+        for slot, player_laser in enumerate(self.player_lasers):
+            pool = player_laser.pool
+            length = pool.high_water
+            alive = pool.alive[:length]
+            state[f'laser_x{slot}'] = np.where(alive, quantize(pool.x[:length]), 0).astype(np.int32)
+            state[f'laser_y{slot}'] = np.where(alive, quantize(pool.y[:length]), 0).astype(np.int32)
+        return state
+
+    def send_snapshots(self) -> None:
+        state = self.snapshots[self.ticks] = self.snapshot()
+        if len(self.snapshots) > SNAPSHOT_HISTORY:
+            del self.snapshots[min(self.snapshots)]
+        full_size = len(encode_snapshot(self.ticks, state))
+        for peer in self.peers.values():
+            # a client that acknowledged nothing yet, or nothing recent, gets a full snapshot
+            data = encode_snapshot(self.ticks, state, peer.acked, self.snapshots.get(peer.acked))
+            self.link.send(data, peer.address)
+            peer.snapshots += 1
+            peer.snapshot_bytes += len(data)
+            peer.full_bytes += full_size
+
+    def wait_for_players(self) -> None:
+        next_snapshot = 0.0
+        while len(self.peers) < self.min_players:
+            for data, address in self.link.receive():
+                self.handle_packet(data, address)
+            for peer in self.peers.values():
+                # nothing moves before the match starts, acknowledging the inputs stops the clients replaying them
+                peer.skip_inputs()
+            if time.perf_counter() >= next_snapshot:
+                # the clients that joined already see the wave and know the server is still there
+                self.send_snapshots()
+                self.ticks += SNAPSHOT_INTERVAL
+                next_snapshot = time.perf_counter() + LOBBY_SNAPSHOT_TIME
+            time.sleep(0.001)
+        self.start_tick = self.ticks
+
+    def run(self, match_ticks=0) -> None:
+        self.wait_for_players()
+        started = next_tick = time.perf_counter()
+        while self.running:
+            for data, address in self.link.receive():
+                self.handle_packet(data, address)
+            now = time.perf_counter()
+            for peer in [peer for peer in self.peers.values() if now - peer.last_heard > NET_TIMEOUT]:
+                self.leave(peer)
+
+            self.update()
+            if self.ticks % SNAPSHOT_INTERVAL == 0:
+                self.send_snapshots()
+            if (match_ticks and self.ticks - self.start_tick >= match_ticks) or not self.peers:
+                self.running = False
+
+            # the server has no frames, it sleeps until the next tick is due
+            next_tick += TICK_TIME
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -MAX_FRAME_TIME:
+                # like the frame clamp of the game loop, a stall is not caught up with a burst of ticks
+                next_tick = time.perf_counter()
+        self.seconds = time.perf_counter() - started
+        self.finish()
+
+    def finish(self) -> None:
+        if self.ticks not in self.snapshots:
+            self.snapshots[self.ticks] = self.snapshot()
+        final = encode_snapshot(self.ticks, self.snapshots[self.ticks])
+        for message in (final, bytes([MSG_BYE])):
+            for _ in range(NET_FAREWELLS):
+                for peer in self.peers.values():
+                    self.link.send(message, peer.address)
+        self.link.drain()
+        self.link.close()
+
+    def stats(self) -> dict:
+        seconds = self.seconds or 1.0
+        clients = []
+        for peer in self.departed + list(self.peers.values()):
+            clients.append({
+                'slot': peer.slot,
+                'snapshots': peer.snapshots,
+                'bytes_sent': self.link.sent_to.get(peer.address, 0),
+                'bytes_per_second': round(self.link.sent_to.get(peer.address, 0) / seconds, 1),
+                'snapshot_bytes': round(peer.snapshot_bytes / max(peer.snapshots, 1), 2),
+                'full_snapshot_bytes': round(peer.full_bytes / max(peer.snapshots, 1), 2),
+            })
+        return {'role': 'server', 'ticks': self.ticks - self.start_tick, 'seconds': round(self.seconds, 3),
+                'clients': clients, 'send_errors': dict(self.link.send_errors), 'final_tick': self.ticks,
+                'checksum': state_checksum(self.snapshots[self.ticks])}
+
+    def report(self, path=None) -> None:
+        stats = self.stats()
+        print(f'server: {stats["ticks"]} ticks in {stats["seconds"]:.2f} s, '
+              f'final state {stats["checksum"]:08x}')
+        for client in stats['clients']:
+            print(f'  player {client["slot"] + 1}: {client["snapshots"]} snapshots of '
+                  f'{client["snapshot_bytes"]:.1f} bytes (full {client["full_snapshot_bytes"]:.1f}), '
+                  f'{client["bytes_per_second"] / 1024:.2f} KiB/s')
+        for error, count in stats['send_errors'].items():
+            print(f'  {count} packets failed to send: {error}')
+        if path:
+            with open(path, 'w') as file:
+                json.dump(stats, file, indent=2)
+
+
+class ClientGame:
+    """
+    A class to play a LAN game hosted by a ServerGame
+    the local player moves as soon as a key is pressed and is corrected by every snapshot, the wave, the other
+    players and every shot are drawn between the two snapshots around a render time that trails the newest snapshot
+    by INTERPOLATION_DELAY ticks
+    ...
+    Attributes
+    ----------
+    link : NetLink  the client socket
+    server : tuple  address of the server
+    assets : AssetManager   images and fonts the client draws with
+    screen : Surface    the window, given to game_loop()
+    slot : int  player slot given by the server
+    player : Player     the local player, predicted
+    score : Score   score of the local player, as sent by the server
+    score_text : HudField   draws the score, None until the first frame
+    keys : int  INPUT_* bits of the keys held down
+    bits : int  INPUT_* bits sent for the last tick
+    seq : int   sequence number of the last input
+    inputs : dict   (bits, predicted x) of the inputs the server has not applied yet, by sequence number,
+                    at most MAX_PENDING_INPUTS
+    recent : deque  bits of the last INPUT_REDUNDANCY inputs, sent in every input packet
+    snapshots : dict    decoded states by tick, the baselines of the next deltas
+    latest : int    tick of the newest snapshot, None before the first
+    latest_time : float     when the newest snapshot arrived
+    render_tick : float     server tick drawn by the last frame
+    autopilot : bool    the client plays by itself instead of reading the keyboard
+    clock : pygame Clock    caps the rendering frame rate
+    accumulator : float     simulation time (in seconds) not yet consumed by a tick
+    running : bool
+    ticks : int     number of client ticks run so far
+    received : int  snapshots decoded
+    undecodable : int   snapshots dropped because they were malformed or their baseline was gone
+    mispredictions : int    applied inputs after which the server's player stood elsewhere than predicted
+    moved : list    times of the movement key changes not drawn yet
+    unconfirmed : list  (sequence number, time) of the input changes the server has not applied yet
+    confirming : list   (tick, time) of the applied input changes, until the render time reaches their snapshot
+    predicted_latency : list    seconds from a movement key change to the first frame drawing the predicted player
+    confirmed_latency : list    seconds from an input change to the first frame drawing the server's result of it
+    started : float     when the game loop started, 0 before
+    seconds : float     duration of the game loop
+
+    Methods
+    -------
+    connect() -> bool :     joins the server, False when it does not answer or is full
+    handle_event(event) -> None :   applies a single pygame event
+    handle_packet(data) -> None :   applies one packet of the server
+    receive_snapshot(data) -> None :    decodes a snapshot and corrects the prediction when it is the newest
+    reconcile(tick, state) -> None :    moves the player to the server's position and replays the pending inputs
+    autopilot_bits() -> int :   input of the autopilot for the coming tick
+    update() -> None :  advances the local player by exactly one fixed tick and sends the input
+    render(alpha) -> None :     draws the interpolated snapshots and the predicted player
+    game_loop(screen) -> None :     runs the windowed client on the window
+    stats() -> dict :   bandwidth, input to screen latency and the final state
+    report(path) -> None :  prints the stats and writes them to a JSON file when a path is given
+    """
+    def __init__(self, link: NetLink, server: tuple, assets: AssetManager, autopilot=False):
+        self.link = link
+        self.server = server
+        self.assets = assets
+        self.screen = None
+        self.slot = None
+        self.player = Player()
+        self.score = Score()
+        self.score_text = None
+        self.keys = 0
+        self.bits = 0
+        self.seq = 0
+        self.inputs = {}
+        self.recent = deque(maxlen=INPUT_REDUNDANCY)
+        self.snapshots = {}
+        self.latest = None
+        self.latest_time = 0.0
+        self.render_tick = 0.0
+        self.autopilot = autopilot
+        self.clock = pygame.time.Clock()
+        self.accumulator = 0.0
+        self.running = True
+        self.ticks = 0
+        self.received = 0
+        self.undecodable = 0
+        self.mispredictions = 0
+        self.moved = []
+        self.unconfirmed = []
+        self.confirming = []
+        self.predicted_latency = []
+        self.confirmed_latency = []
+        self.started = 0.0
+        self.seconds = 0.0
+
+    def connect(self) -> bool:
+        deadline = time.perf_counter() + NET_TIMEOUT
+        next_hello = 0.0
+        while time.perf_counter() < deadline:
+            if time.perf_counter() >= next_hello:
+                self.link.send(HELLO.pack(MSG_HELLO, NET_MAGIC), self.server)
+                next_hello = time.perf_counter() + 0.2
+            for data, address in self.link.receive():
+                if address != self.server:
+                    continue
+                if data[0] == MSG_BYE:
+                    return False
+                if data[0] == MSG_WELCOME and len(data) == WELCOME.size:
+                    _, self.slot, tick_rate, _, _ = WELCOME.unpack(data)
+                    if tick_rate != TICK_RATE:
+                        raise ValueError(f'the server runs {tick_rate} ticks per second, not {TICK_RATE}')
+                    return True
+            time.sleep(0.005)
+        return False
+
+    def handle_event(self, event) -> None:
+        if event.type == pygame.WINDOWCLOSE:
+            self.running = False
+            for _ in range(NET_FAREWELLS):
+                self.link.send(bytes([MSG_BYE]), self.server)
+        elif event.type == pygame.KEYDOWN and event.key in NET_KEYS:
+            self.keys |= NET_KEYS[event.key]
+        elif event.type == pygame.KEYUP and event.key in NET_KEYS:
+            self.keys &= ~NET_KEYS[event.key]
+
+    def handle_packet(self, data: bytes) -> None:
+        if data[0] == MSG_SNAPSHOT:
+            self.receive_snapshot(data)
+        elif data[0] == MSG_BYE:
+            self.running = False
+
+    def receive_snapshot(self, data: bytes) -> None:
+        try:
+            tick, state = decode_snapshot(data, self.snapshots)
+        except ValueError:
+            self.undecodable += 1
+            return
+        if state is None:
+            self.undecodable += 1
+            return
+        if tick in self.snapshots:
+            return
+        self.received += 1
+        self.snapshots[tick] = state
+        if len(self.snapshots) > SNAPSHOT_HISTORY:
+            del self.snapshots[min(self.snapshots)]
+        if self.latest is None or tick > self.latest:
+            self.latest = tick
+            self.latest_time = time.perf_counter()
+            self.reconcile(tick, state)
+
+    def reconcile(self, tick: int, state: dict) -> None:
+        applied = int(state['player_input'][self.slot])
+        server_x = float(dequantize(state['player_x'][self.slot]))
+        self.score.total_score = int(state['player_score'][self.slot])
+        predicted = self.inputs.get(applied)
+        if predicted is not None and predicted[1] != server_x:
+            self.mispredictions += 1
+        for seq in [seq for seq in self.inputs if seq <= applied]:
+            del self.inputs[seq]
+        self.confirming += [(tick, changed) for seq, changed in self.unconfirmed if seq <= applied]
+        self.unconfirmed = [(seq, changed) for seq, changed in self.unconfirmed if seq > applied]
+
+        # replaying the inputs the server has not applied yet on top of its position
+        prev_player_x = self.player.prev_player_x
+        self.player.player_x = server_x
+        for seq, (bits, _) in self.inputs.items():
+            apply_input(bits, self.player)
+            self.player.player_movement()
+            self.inputs[seq] = (bits, self.player.player_x)
+        # the correction shows up as part of the movement drawn in the current tick
+        self.player.prev_player_x = prev_player_x
+
+    def autopilot_bits(self) -> int:
+        # chase the lowest enemy and keep pressing and releasing fire
+        bits = INPUT_FIRE if self.ticks // AUTOPILOT_FIRE_TICKS % 2 == 0 else 0
+        if self.latest is None:
+            return bits
+        state = self.snapshots[self.latest]
+        if not len(state['enemy_y']):
+            return bits
+        offset = float(dequantize(state['enemy_x'][np.argmax(state['enemy_y'])])) - self.player.player_x
+        if abs(offset) > PLAYER_MOVE:
+            bits |= INPUT_RIGHT if offset > 0 else INPUT_LEFT
+        return bits
+
+    def update(self) -> None:
+        bits = self.autopilot_bits() if self.autopilot else self.keys
+        self.seq += 1
+        if bits != self.bits:
+            now = time.perf_counter()
+            self.unconfirmed.append((self.seq, now))
+            if (bits ^ self.bits) & (INPUT_LEFT | INPUT_RIGHT):
+                self.moved.append(now)
+        self.bits = bits
+        # the local player moves now, the server's answer corrects it later
+        apply_input(bits, self.player)
+        self.player.player_movement()
+        self.inputs[self.seq] = (bits, self.player.player_x)
+        if len(self.inputs) > MAX_PENDING_INPUTS:
+            del self.inputs[next(iter(self.inputs))]
+        self.recent.append(bits)
+        ack = NO_BASELINE if self.latest is None else self.latest
+        self.link.send(encode_input(ack, self.seq, list(self.recent)), self.server)
+        self.ticks += 1
+
+    def render(self, alpha: float) -> None:
+        # every remote entity moves every frame, so the whole screen is redrawn
+        screen, assets = self.screen, self.assets
+        screen.blit(assets.image('background'), (0, 0))
+        if self.latest is not None:
+            now = time.perf_counter()
+            target = min(self.latest + (now - self.latest_time) * TICK_RATE - INTERPOLATION_DELAY, self.latest)
+            self.render_tick = max(self.render_tick, target)
+            older = max((tick for tick in self.snapshots if tick <= self.render_tick), default=min(self.snapshots))
+            newer = min((tick for tick in self.snapshots if tick > self.render_tick), default=older)
+            previous, current = self.snapshots[older], self.snapshots[newer]
+            fraction = min(max((self.render_tick - older) / (newer - older), 0.0), 1.0) if newer != older else 0.0
+
+            for slot in np.flatnonzero(current['player_active']).tolist():
+                if slot != self.slot:
+                    x = lerp(previous['player_x'][slot], current['player_x'][slot], fraction) / POSITION_SCALE
+                    screen.blit(assets.image('player'), (x, INIT_PLAYER_Y))
+            laser_img = assets.image(PROJECTILE_TYPES[PLAYER_LASER].sprite)
+            offset_x, offset_y = PROJECTILE_TYPES[PLAYER_LASER].offset
+            for slot in range(MAX_PLAYERS):
+                live = current[f'laser_y{slot}'] != 0
+                if not live.any():
+                    continue
+                xs, ys = interpolate_positions(previous[f'laser_x{slot}'], previous[f'laser_y{slot}'],
+                                               current[f'laser_x{slot}'], current[f'laser_y{slot}'], fraction)
+                screen.blits([(laser_img, (x + offset_x, y + offset_y))
+                         for x, y in zip(xs[live].tolist(), ys[live].tolist())], doreturn=False)
+            xs, ys = interpolate_positions(previous['enemy_x'], previous['enemy_y'],
+                                           current['enemy_x'], current['enemy_y'], fraction)
+            enemy_img = assets.image('enemy1')
+            screen.blits([(enemy_img, position) for position in zip(xs.tolist(), ys.tolist())], doreturn=False)
+        player = self.player
+        screen.blit(assets.image('player'), (lerp(player.prev_player_x, player.player_x, alpha), player.player_y))
+        if self.score_text is None:
+            self.score_text = HudField(assets.font(*HUD_FONT), 'Score : ', (self.score.score_x, self.score.score_y))
+        self.score_text.set(self.score.total_score)
+        self.score_text.draw(screen)
+        pygame.display.update()
+
+        # the frame is on the screen, every input it shows the result of has reached the screen
+        now = time.perf_counter()
+        self.predicted_latency += [now - changed for changed in self.moved]
+        self.moved = []
+        self.confirmed_latency += [now - changed for tick, changed in self.confirming if tick <= self.render_tick]
+        self.confirming = [(tick, changed) for tick, changed in self.confirming if tick > self.render_tick]
+
+    def game_loop(self, screen: pygame.Surface) -> None:
+        self.screen = screen
+        self.started = last_heard = time.perf_counter()
+        while self.running:
+            self.accumulator += min(self.clock.tick(FPS) / 1000, MAX_FRAME_TIME)
+            for event in pygame.event.get():
+                self.handle_event(event)
+            for data, address in self.link.receive():
+                if address == self.server:
+                    last_heard = time.perf_counter()
+                    self.handle_packet(data)
+            if time.perf_counter() - last_heard > NET_TIMEOUT:
+                # the server is gone
+                self.running = False
+
+            while self.accumulator >= TICK_TIME:
+                self.update()
+                self.accumulator -= TICK_TIME
+            self.render(self.accumulator / TICK_TIME)
+        self.seconds = time.perf_counter() - self.started
+        self.link.drain()
+        self.link.close()
+
+    def stats(self) -> dict:
+        seconds = self.seconds or 1.0
+        return {
+            'role': 'client', 'slot': self.slot, 'ticks': self.ticks, 'seconds': round(self.seconds, 3),
+            'snapshots': self.received, 'undecodable': self.undecodable,
+            'bytes_received': self.link.bytes_received, 'bytes_sent': self.link.bytes_sent,
+            'down_bytes_per_second': round(self.link.bytes_received / seconds, 1),
+            'up_bytes_per_second': round(self.link.bytes_sent / seconds, 1),
+            'predicted_latency_ms': percentiles_ms(self.predicted_latency),
+            'confirmed_latency_ms': percentiles_ms(self.confirmed_latency),
+            'mispredictions': self.mispredictions,
+            'final_tick': self.latest,
+            'checksum': state_checksum(self.snapshots[self.latest]) if self.latest is not None else None,
+        }
+
+    def report(self, path=None) -> None:
+        stats = self.stats()
+        predicted, confirmed = stats['predicted_latency_ms'], stats['confirmed_latency_ms']
+        print(f'player {self.slot + 1}: {stats["snapshots"]} snapshots ({stats["undecodable"]} undecodable), '
+              f'down {stats["down_bytes_per_second"] / 1024:.2f} KiB/s, '
+              f'up {stats["up_bytes_per_second"] / 1024:.2f} KiB/s')
+        print(f'  input to screen ms: predicted p50 {predicted["p50"]} p95 {predicted["p95"]}, '
+              f'confirmed p50 {confirmed["p50"]} p95 {confirmed["p95"]}, {stats["mispredictions"]} mispredictions')
+        if stats['final_tick'] is not None:
+            print(f'  final tick {stats["final_tick"]}, state {stats["checksum"]:08x}')
+        if path:
+            with open(path, 'w') as file:
+                json.dump(stats, file, indent=2)
@@ -1,38 +1,81 @@
+import argparse
+import threading
+import time
+import numpy as np
 import pygame
 import random
-import math
 
-# initialisation
-pygame.init()
+import frame_profiler
+from asset_manager import AssetManager
+from collision import COLLISION_RADIUS, ENEMY_LAYER, PLAYER_LASER_LAYER, CollisionWorld, first_hits
+from hud import HudField
+from netplay import MAX_NET_ENEMIES, MAX_PLAYERS, NET_PORT
+from projectiles import ProjectilePool, ProjectileType
+from replay import Replay
 
-# creating the display Surface of 800x600 size
-screen = pygame.display.set_mode(size=(800, 600))
+# importing this module has no side effects, the window is only created by init_display()
+# the display Surface, None until init_display() runs and always None in headless mode
+screen = None
 
-# setting title and icon
-pygame.display.set_caption('Space Invader')  # setting the title
-icon = pygame.image.load('assets/icon.png')  # loading the icon asset
-pygame.display.set_icon(icon)
-
-# loading the image assets
-enemy_1_img = pygame.image.load('assets/enemy1.png').convert_alpha()
-player_img = pygame.image.load('assets/player.png').convert_alpha()
-background_img = pygame.image.load('assets/background.png').convert_alpha()
-laser_player_img = pygame.image.load('assets/laser_player.png').convert_alpha()
+# the image assets are loaded on first use
+assets = AssetManager()
 
 # setting global constant fields
+# the simulation advances in fixed ticks, so every movement value below is in pixels per tick
+# and the game speed no longer depends on how fast frames are drawn
+TICK_RATE = 120  # simulation ticks per second
+TICK_TIME = 1 / TICK_RATE
+MAX_FRAME_TIME = 0.25  # a frame longer than this is clamped so a stall can't trigger a burst of catch-up ticks
+
 # we are using random numbers to spawn enemies randomly on the screen
 ENEMY_SPAWN_X = (0, 735)
 ENEMY_SPAWN_Y = (50, 150)
-ENEMY_X_MOVE = 0.5  # initially the enemy will start to move in the right direction
+ENEMY_X_MOVE = 150 / TICK_RATE  # 150 px/s, initially the enemy will start to move in the right direction
 ENEMY_Y_MOVE = 40   # enemy will never move up so always +40 downwards
+ENEMY_COUNT = 4
+# waves up to this size move in a Python loop, below it the per call cost of NumPy outweighs the loop
+SMALL_WAVE = 24
 
-PLAYER_MOVE = 1
+PLAYER_MOVE = 300 / TICK_RATE  # 300 px/s
 INIT_PLAYER_X = 370
 INIT_PLAYER_Y = 500
-LASER_PLAYER_MOVE = 4
+LASER_PLAYER_MOVE = 1200 / TICK_RATE  # 1200 px/s
+
+# projectile types, a pool stores the index into this list
+# these constants +25 +10 are to align the laser with the player
+PROJECTILE_TYPES = [
+    ProjectileType('player_laser', -LASER_PLAYER_MOVE, 'laser_player', (25, 10)),
+]
+PLAYER_LASER = 0
+
+# fire mode: (ticks between shots while the trigger is held, angle of every shot in degrees)
+# single is the classic mode, one shot on the screen at a time and a new key press for every shot
+FIRE_MODES = {
+    'single': (None, (0,)),
+    'rapid': (TICK_RATE // 10, (0,)),
+    'spread': (TICK_RATE // 4, (-12, 0, 12)),
+}
 
 SCREEN_BOUND = 736  # 800 - 64 = 736 as our player image is 64 x 64
-FPS = 300
+FPS = 60  # rendering cap, drawing interpolates between simulation ticks
+HUD_FONT = ('freesansbold.ttf', 28)
+FPS_X = 620  # x coordinate of the FPS counter, the score sits at the top left
+SCREEN_SIZE = (800, 600)
+# images loaded behind the loading screen, the small sprites come with the atlas
+STARTUP_IMAGES = ('background',)
+DIRTY_RECT_LIMIT = 100  # above this many sprites restoring the whole background at once is cheaper
+
+
+def lerp(previous: float, current: float, alpha: float) -> float:
+    """
+    linearly interpolates between the previous and the current tick's value
+    :param previous: value at the previous tick
+    :param current: value at the current tick
+    :param alpha: fraction of a tick elapsed since the current tick, in [0, 1]
+    :return: float
+    """
+
+    return previous + (current - previous) * alpha
 
 
 def has_collided(x1: int, y1: int, x2: int, y2: int) -> bool:
@@ -46,10 +89,10 @@ def has_collided(x1: int, y1: int, x2: int, y2: int) -> bool:
     :return: boolean
     """
 
-    x_sq = math.pow((x2 - x1), 2)
-    y_sq = math.pow((y2 - y1), 2)
-    distance = math.sqrt(x_sq + y_sq)
-    return distance < 50
+    # comparing the squared distance avoids the sqrt
+    x_diff = x2 - x1
+    y_diff = y2 - y1
+    return x_diff * x_diff + y_diff * y_diff < COLLISION_RADIUS * COLLISION_RADIUS
 
 
 class Score:
@@ -59,84 +102,169 @@ class Score:
     Attributes
     ----------
     total_score : int   total score of the game
-    font : pygame Font  holds the font of the displayed score
     score_x : int       x coordinate of the displayed score
     score_y : int       y coordinate of the displayed  score
+    score_text : HudField   the displayed score, only rendered again when the score changes, None until first shown
 
     Methods
     -------
-    show_score() -> None    renders and draws the score on the screen
+    show_score() -> Rect    draws the score on the screen, returns the area drawn
     """
     def __init__(self):
         self.total_score = 0
-        self.font = pygame.font.Font('freesansbold.ttf', 28)
         self.score_x = 10
         self.score_y = 10
+        self.score_text = None
 
-    def show_score(self) -> None:
-        rendered_score = self.font.render("Score : " + str(self.total_score), True, (255, 255, 255))
-        screen.blit(rendered_score, (self.score_x, self.score_y))
+    def show_score(self) -> pygame.Rect:
+        if self.score_text is None:
+            self.score_text = HudField(assets.font(*HUD_FONT), 'Score : ', (self.score_x, self.score_y))
+        self.score_text.set(self.total_score)
+        return self.score_text.draw(screen)
 
 
 class Enemy:
     """
     A class to represent the enemies of the game
+    the swarm is stored as a struct of arrays so a whole wave is moved, bounced and drawn with array operations
     ...
     Attributes
     ----------
-    enemy_x : array of int  keeps track of the x coordinate of the enemies
-    enemy_y : array of int  keeps track of the y coordinate of the enemies
-    enemy_x_change : int     x coordinate movement value
+    enemy_x : ndarray of float  keeps track of the x coordinate of the enemies
+    enemy_y : ndarray of float  keeps track of the y coordinate of the enemies
+    prev_enemy_x : ndarray of float  x coordinates of the enemies at the previous tick
+    prev_enemy_y : ndarray of float  y coordinates of the enemies at the previous tick
+    enemy_x_change : int     x coordinate movement value, shared by the whole formation
     enemy_y_change : int     y coordinate movement value
     enemy_count : int        counts the number of enemies currently present in the game
+    collisions : CollisionWorld     the collision world the enemies are registered with
 
     Methods
     -------
     make_enemy_list() -> None : Randomly spawns enemy_count number of enemies
-    set_enemy(index) -> None : draws the enemy having coordinates in the index
-    enemy_movement(player_laser, score) -> None: checks the enemy movement as well as collision with players laser
-                                                also increases score if collision occurs
+    collision_positions() -> tuple : coordinates of the enemies for the collision world
+    respawn_enemy(index) -> None : moves the enemy in the index to a random spawn position
+    set_enemy(index, alpha) -> None : draws the enemy having coordinates in the index
+    set_enemies(alpha) -> list : draws every enemy with a single batched blit, returns the areas drawn
+    move_enemies() -> None : advances the enemies by one tick
+    move_small_wave() -> None : move_enemies() on Python floats, used for waves of up to SMALL_WAVE enemies
+    enemy_collisions(player_laser, score) -> None : checks the collision with players laser, also increases score
+                                                    if collision occurs
+    enemy_movement(player_laser, score) -> None: move_enemies() followed by enemy_collisions()
+    team_collisions(player_lasers, scores) -> None : enemy_collisions() for several players sharing the wave,
+                                                     each hit scores for the owner of the laser
     """
-    def __init__(self):
+    def __init__(self, enemy_count=ENEMY_COUNT, collisions=None):
 
-        self.enemy_x = []
-        self.enemy_y = []
+        self.enemy_x = np.empty(0)
+        self.enemy_y = np.empty(0)
+        self.prev_enemy_x = np.empty(0)
+        self.prev_enemy_y = np.empty(0)
         self.enemy_x_change = ENEMY_X_MOVE
         self.enemy_y_change = ENEMY_Y_MOVE
-        self.enemy_count = 4
+        self.enemy_count = enemy_count
         self.make_enemy_list()
+        self.collisions = collisions if collisions is not None else CollisionWorld()
+        self.collisions.register(ENEMY_LAYER, self)
 
     def make_enemy_list(self) -> None:
-        for _ in range(self.enemy_count):
-            self.enemy_x.append(random.randint(ENEMY_SPAWN_X[0], ENEMY_SPAWN_X[1]))
-            self.enemy_y.append(random.randint(ENEMY_SPAWN_Y[0], ENEMY_SPAWN_Y[1]))
-
-    def set_enemy(self, index) -> None:
-        screen.blit(enemy_1_img, (self.enemy_x[index], self.enemy_y[index]))
+        # spawning goes through the random module so a single random.seed() reproduces the whole game
+        spawns = [(random.randint(ENEMY_SPAWN_X[0], ENEMY_SPAWN_X[1]),
+                   random.randint(ENEMY_SPAWN_Y[0], ENEMY_SPAWN_Y[1])) for _ in range(self.enemy_count)]
+        positions = np.array(spawns, dtype=np.float64).reshape(self.enemy_count, 2)
+        self.enemy_x = np.ascontiguousarray(positions[:, 0])
+        self.enemy_y = np.ascontiguousarray(positions[:, 1])
+        self.prev_enemy_x = self.enemy_x.copy()
+        self.prev_enemy_y = self.enemy_y.copy()
+
+    def collision_positions(self) -> tuple:
+        return self.enemy_x, self.enemy_y
+
+    def respawn_enemy(self, index) -> None:
+        self.enemy_x[index] = random.randint(ENEMY_SPAWN_X[0], ENEMY_SPAWN_X[1])
+        self.enemy_y[index] = random.randint(ENEMY_SPAWN_Y[0], ENEMY_SPAWN_Y[1])
+        # a respawn is a teleport, it must not be interpolated across the screen
+        self.prev_enemy_x[index] = self.enemy_x[index]
+        self.prev_enemy_y[index] = self.enemy_y[index]
+
+    def set_enemy(self, index, alpha=1.0) -> None:
+        screen.blit(assets.image('enemy1'), (lerp(self.prev_enemy_x[index], self.enemy_x[index], alpha),
+                                  lerp(self.prev_enemy_y[index], self.enemy_y[index], alpha)))
+
+    def set_enemies(self, alpha=1.0) -> list:
+        xs = lerp(self.prev_enemy_x, self.enemy_x, alpha).tolist()
+        ys = lerp(self.prev_enemy_y, self.enemy_y, alpha).tolist()
+        enemy_img = assets.image('enemy1')
+        return screen.blits([(enemy_img, position) for position in zip(xs, ys)])
 
     def enemy_movement(self, player_laser, score) -> None:
-        # enemy movements
-        for i in range(self.enemy_count):
-            self.enemy_x[i] += self.enemy_x_change
-            if self.enemy_x[i] <= 0:
-                # moving enemy to down and right
-                self.enemy_x_change = ENEMY_X_MOVE
-                self.enemy_y[i] += self.enemy_y_change
-            elif self.enemy_x[i] >= SCREEN_BOUND:
-                # moving enemy to down and left
-                self.enemy_x_change = -ENEMY_X_MOVE
-                self.enemy_y[i] += self.enemy_y_change
-
-            # player's laser collision
-            if has_collided(self.enemy_x[i], self.enemy_y[i], player_laser.laser_player_x,
-                            player_laser.laser_player_y):
-                # reset player's laser, increase score by 1 and respawn enemy
-                player_laser.reset_player_laser()
-                score.total_score += 1
-                self.enemy_x[i] = random.randint(ENEMY_SPAWN_X[0], ENEMY_SPAWN_X[1])
-                self.enemy_y[i] = random.randint(ENEMY_SPAWN_Y[0], ENEMY_SPAWN_Y[1])
-
-            self.set_enemy(i)
+        self.move_enemies()
+        self.enemy_collisions(player_laser, score)
+
+    def move_enemies(self) -> None:
+        if self.enemy_count <= SMALL_WAVE:
+            self.move_small_wave()
+            return
+        # enemy movements, the whole formation steps by the same amount
+        self.prev_enemy_x[:] = self.enemy_x
+        self.prev_enemy_y[:] = self.enemy_y
+        self.enemy_x += self.enemy_x_change
+
+        # enemies touching a wall move down, the formation turns around once per tick
+        # so every enemy moves in the same direction regardless of its index
+        hit_left = self.enemy_x <= 0
+        hit_right = self.enemy_x >= SCREEN_BOUND
+        self.enemy_y[hit_left | hit_right] += self.enemy_y_change
+        if self.enemy_x_change < 0 and hit_left.any():
+            # moving enemy to down and right
+            self.enemy_x_change = ENEMY_X_MOVE
+        elif self.enemy_x_change > 0 and hit_right.any():
+            # moving enemy to down and left
+            self.enemy_x_change = -ENEMY_X_MOVE
+
+    def move_small_wave(self) -> None:
+        # must stay step for step equal to the vectorized branch, tests/test_enemy.py compares the two
+        self.prev_enemy_x[:] = self.enemy_x
+        self.prev_enemy_y[:] = self.enemy_y
+        enemy_x = [x + self.enemy_x_change for x in self.enemy_x.tolist()]
+        hit_left = hit_right = False
+        for index, x in enumerate(enemy_x):
+            if x <= 0:
+                hit_left = True
+                self.enemy_y[index] += self.enemy_y_change
+            elif x >= SCREEN_BOUND:
+                hit_right = True
+                self.enemy_y[index] += self.enemy_y_change
+        self.enemy_x[:] = enemy_x
+        if self.enemy_x_change < 0 and hit_left:
+            self.enemy_x_change = ENEMY_X_MOVE
+        elif self.enemy_x_change > 0 and hit_right:
+            self.enemy_x_change = -ENEMY_X_MOVE
+
+    def enemy_collisions(self, player_laser, score) -> None:
+        # player's laser collision, a laser is consumed by the first enemy it hits
+        enemy_hits, laser_hits = first_hits(*self.collisions.query(ENEMY_LAYER, PLAYER_LASER_LAYER))
+        if enemy_hits.size:
+            # remove the lasers, increase score by 1 per hit and respawn the enemies
+            player_laser.reset_player_laser(laser_hits)
+            score.total_score += len(enemy_hits)
+            for i in enemy_hits:
+                self.respawn_enemy(i)
+
+    def team_collisions(self, player_lasers: list, scores: list) -> None:
+        # every player's shots share the player laser layer, registered in the order of player_lasers
+        enemy_hits, laser_hits = first_hits(*self.collisions.query(ENEMY_LAYER, PLAYER_LASER_LAYER))
+        if not enemy_hits.size:
+            return
+        ends = np.cumsum([len(player_laser.pool.live) for player_laser in player_lasers])
+        owners = np.searchsorted(ends, laser_hits, side='right')
+        for slot, player_laser in enumerate(player_lasers):
+            mine = owners == slot
+            if mine.any():
+                player_laser.reset_player_laser(laser_hits[mine] - (ends[slot] - len(player_laser.pool.live)))
+                scores[slot].total_score += int(mine.sum())
+        for i in enemy_hits:
+            self.respawn_enemy(i)
 
 
 class Player:
@@ -148,131 +276,501 @@ class Player:
     player_x : int  represents the x coordinate of the player
     player_y : int  represents the y coordinate of the player
     player_x_change : int   represents the x movement value of the player
+    prev_player_x : int     x coordinate of the player at the previous tick
 
     Methods
     -------
-    set_player() -> None :  draws the player on the screen
-    player_movement() -> None : responsible for player's movement
+    set_player(alpha) -> Rect :  draws the player on the screen, returns the area drawn
+    player_movement() -> None : advances the player's movement by one tick
     """
     def __init__(self):
         self.player_x = INIT_PLAYER_X
         self.player_y = INIT_PLAYER_Y
         self.player_x_change = 0
+        self.prev_player_x = self.player_x
 
-    def set_player(self) -> None:
-        # blit() method draws the image (Surface) on the (x, y) coordinate
-        screen.blit(player_img, (self.player_x, self.player_y))
+    def set_player(self, alpha=1.0) -> pygame.Rect:
+        # blit() method draws the image (Surface) on the (x, y) coordinate and returns the affected Rect
+        return screen.blit(assets.image('player'), (lerp(self.prev_player_x, self.player_x, alpha), self.player_y))
 
     def player_movement(self) -> None:
+        self.prev_player_x = self.player_x
         # to prevent the out of screen issue
         new_player_x = self.player_x + self.player_x_change
         if new_player_x <= 0 or new_player_x >= SCREEN_BOUND:
             self.player_x_change = 0
         # updates the player's coordinates
         self.player_x += self.player_x_change
-        self.set_player()
 
 
 class PlayerLaser:
     """
-    A class to represent the player's laser
+    A class to represent the player's laser gun, its shots live in a ProjectilePool
     ...
     Attributes
     ---------
-    laser_player_x : int    holds the x coordinate of the laser
-    laser_player_y : int    holds the y coordinate of the laser
-    laser_player_change_y : int    holds the y coordinate change of the laser
-    laser_player_fire : bool    holds the fire state of the laser
+    pool : ProjectilePool   holds every live shot of the player
+    fire_mode : str     key of FIRE_MODES
+    trigger : bool      true while the fire key is held
+    cooldown : int      ticks left before the gun can fire again
 
     Methods
     -------
-    fire_player_laser() -> None :   draws the laser under the player at the center
-    reset_player_laser() -> None :  resets the laser's positions
-    laser_movement() -> None : responsible for the movement of the laser after fire
+    laser_player_fire -> bool :     true while at least one shot is on the screen
+    pull_trigger(player_x) -> None :    fires if the gun is ready and keeps firing automatic modes
+    release_trigger() -> None :     stops automatic fire
+    fire(player_x) -> bool :    fires a volley from the player's position if the gun is ready
+    fire_player_laser(alpha) -> list :   draws the shots, returns the areas drawn
+    reset_player_laser(hits) -> None :  removes the shots in hits, indices in the order of the collision layer
+    laser_movement(player_x) -> None : advances every shot by one tick and fires while the trigger is held
     """
-    def __init__(self):
-        self.laser_player_x = 0
-        self.laser_player_y = INIT_PLAYER_Y  # initially same level as player
-        self.laser_player_change_y = LASER_PLAYER_MOVE
-        self.laser_player_fire = False  # true means laser has been fired
-
-    def fire_player_laser(self) -> None:
-        screen.blit(laser_player_img, (self.laser_player_x + 25, self.laser_player_y + 10))
-
-    def reset_player_laser(self):
-        self.laser_player_x = 0
-        self.laser_player_y = INIT_PLAYER_Y
-        self.laser_player_fire = False
-
-    def laser_movement(self) -> None:
-        # player's laser movement
-        if self.laser_player_y <= 0:
-            # laser crossed the screen so reset it
-            self.reset_player_laser()
-
-        if self.laser_player_fire:
-            self.laser_player_y -= self.laser_player_change_y
-            # these constants +25 +10 are to align the laser with the player
-            self.fire_player_laser()
+    def __init__(self, collisions=None, fire_mode='single'):
+        self.pool = ProjectilePool(PROJECTILE_TYPES, (-64, 0, 800, 600))
+        self.fire_mode = fire_mode
+        self.trigger = False
+        self.cooldown = 0
+        if collisions is not None:
+            collisions.register(PLAYER_LASER_LAYER, self.pool)
+
+    @property
+    def laser_player_fire(self) -> bool:
+        return self.pool.live_count() > 0
+
+    def pull_trigger(self, player_x) -> None:
+        self.trigger = True
+        self.fire(player_x)
+
+    def release_trigger(self) -> None:
+        self.trigger = False
+
+    def fire(self, player_x) -> bool:
+        interval, angles = FIRE_MODES[self.fire_mode]
+        if self.cooldown > 0 or (interval is None and self.laser_player_fire):
+            return False
+        # the laser starts at the same level as the player
+        self.pool.spawn(PLAYER_LASER, player_x, INIT_PLAYER_Y, angles)
+        self.cooldown = interval or 0
+        return True
+
+    def fire_player_laser(self, alpha=1.0) -> list:
+        return self.pool.draw(screen, assets.image, alpha)
+
+    def reset_player_laser(self, hits) -> None:
+        self.pool.kill(self.pool.live[hits])
+
+    def laser_movement(self, player_x) -> None:
+        # player's laser movement, shots that crossed the screen are culled by the pool
+        self.pool.update()
+        if self.cooldown > 0:
+            self.cooldown -= 1
+        if self.trigger and FIRE_MODES[self.fire_mode][0] is not None:
+            self.fire(player_x)
 
 
 class Game:
-    def __init__(self):
+    """
+    A class to run the game
+    ...
+    Attributes
+    ----------
+    player : Player
+    player_laser : PlayerLaser
+    enemy : Enemy
+    score : Score
+    collisions : CollisionWorld     broadphase shared by the enemies and every projectile
+    running : bool  tracks the running state of the window
+    clock : pygame Clock    caps the rendering frame rate
+    accumulator : float     simulation time (in seconds) not yet consumed by a tick
+    full_redraw : bool      redraws the whole background and pushes the whole screen every frame
+    fps_text : HudField     the FPS counter, None when it is hidden
+    dirty_rects : list      areas drawn in the previous frame, None when the next frame must draw the whole screen
+    profiler : FrameProfiler    times every phase of a frame, NULL_PROFILER when profiling is off
+    ticks : int     number of simulation ticks run so far
+    replay : Replay     input played back instead of the keyboard, None for live input
+    recorder : Replay   records the live input, None when not recording
+
+    Methods
+    -------
+    handle_event(event) -> None :   applies a single pygame event to the game state
+    handle_live_event(event) -> None :  applies an event from the event queue, recording or ignoring its input
+    autopilot() -> None :   simple deterministic input policy used by the headless mode
+    update() -> None :  advances the simulation by exactly one fixed tick, never draws, feeds the replay input
+    draw_sprites(alpha) -> list :   draws every sprite interpolated by alpha, returns the areas drawn
+    render(alpha) -> None : draws the current state interpolated by alpha between the last two ticks
+    game_loop() -> None :   runs the windowed game
+    run_headless(ticks) -> int :    runs ticks simulation steps without any display, returns the score
+    """
+    def __init__(self, enemy_count=ENEMY_COUNT, full_redraw=False, show_fps=False, fire_mode='single',
+                 profiler=frame_profiler.NULL_PROFILER, replay=None, recorder=None):
+        self.collisions = CollisionWorld()
         self.player = Player()
-        self.player_laser = PlayerLaser()
-        self.enemy = Enemy()
+        self.player_laser = PlayerLaser(self.collisions, fire_mode)
+        self.enemy = Enemy(enemy_count, self.collisions)
         self.score = Score()
         # tracks the running state of the window
         self.running = True
         # setting the CPU clock
-        # setting the clock is necessary as it prevents fast gameplay in powerful cpu
+        # the clock only caps the rendering rate now, the simulation speed is fixed by TICK_RATE
         self.clock = pygame.time.Clock()
+        self.accumulator = 0.0
+        self.full_redraw = full_redraw
+        self.fps_text = HudField(assets.font(*HUD_FONT), 'FPS : ', (FPS_X, 10)) if show_fps else None
+        self.dirty_rects = None
+        self.profiler = profiler
+        self.ticks = 0
+        self.replay = replay
+        self.recorder = recorder
+
+    def handle_event(self, event) -> None:
+        if event.type == pygame.WINDOWCLOSE:
+            # checks if the event is a window close button pressed event
+            self.running = False
+
+        if event.type in (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.VIDEOEXPOSE):
+            # the system may have thrown the window contents away, the undrawn areas must be painted again
+            self.dirty_rects = None
+
+        # checking for keyboard key stroke events
+        if event.type == pygame.KEYDOWN:
+            # KEYDOWN is used to check a button down (press) event
+            if event.key == pygame.K_a or event.key == pygame.K_LEFT:
+                # event is a dict type object with a 'key' as a key and keyboard button code as the value
+                # left movement
+                self.player.player_x_change = -PLAYER_MOVE
+            if event.key == pygame.K_d or event.key == pygame.K_RIGHT:
+                # right movement
+                self.player.player_x_change = PLAYER_MOVE
+            if event.key == pygame.K_SPACE:
+                # fire laser
+                self.player_laser.pull_trigger(self.player.player_x)
+
+        elif event.type == pygame.KEYUP:
+            if event.key == pygame.K_SPACE:
+                self.player_laser.release_trigger()
+            if event.key == pygame.K_a or event.key == pygame.K_d or event.key == pygame.K_LEFT or pygame.K_RIGHT:
+                self.player.player_x_change = 0
+
+    def handle_live_event(self, event) -> None:
+        if self.replay is not None and event.type in (pygame.KEYDOWN, pygame.KEYUP):
+            # while a replay runs the keyboard is ignored
+            return
+        if self.recorder is not None:
+            self.recorder.record(self.ticks, event)
+        self.handle_event(event)
+
+    def autopilot(self) -> None:
+        # chase the lowest enemy and keep the trigger pulled
+        target = int(np.argmax(self.enemy.enemy_y))
+        offset = self.enemy.enemy_x[target] - self.player.player_x
+        if abs(offset) <= PLAYER_MOVE:
+            self.player.player_x_change = 0
+        else:
+            self.player.player_x_change = PLAYER_MOVE if offset > 0 else -PLAYER_MOVE
+        self.player_laser.pull_trigger(self.player.player_x)
+
+    def update(self) -> None:
+        if self.replay is not None:
+            for event in self.replay.events_at(self.ticks):
+                self.handle_event(event)
+        profiler = self.profiler
+        self.player.player_movement()
+        profiler.lap(frame_profiler.PLAYER_MOVEMENT)
+        self.player_laser.laser_movement(self.player.player_x)
+        profiler.lap(frame_profiler.LASER_MOVEMENT)
+        self.enemy.move_enemies()
+        profiler.lap(frame_profiler.ENEMY_MOVEMENT)
+        self.enemy.enemy_collisions(self.player_laser, self.score)
+        profiler.lap(frame_profiler.ENEMY_COLLISION)
+        self.ticks += 1
+
+    def draw_sprites(self, alpha: float) -> list:
+        profiler = self.profiler
+        rects = [self.player.set_player(alpha)]
+        profiler.lap(frame_profiler.PLAYER_BLIT)
+        rects += self.player_laser.fire_player_laser(alpha)
+        profiler.lap(frame_profiler.LASER_BLIT)
+        rects += self.enemy.set_enemies(alpha)
+        profiler.lap(frame_profiler.ENEMY_BLIT)
+        rects.append(self.score.show_score())
+        if self.fps_text is not None:
+            self.fps_text.set(round(self.clock.get_fps()))
+            rects.append(self.fps_text.draw(screen))
+        profiler.lap(frame_profiler.SHOW_SCORE)
+        rects += profiler.draw(screen, self.clock, FPS)
+        profiler.lap(frame_profiler.OVERLAY)
+        return rects
+
+    def render(self, alpha: float) -> None:
+        if self.full_redraw or self.dirty_rects is None or len(self.dirty_rects) > DIRTY_RECT_LIMIT:
+            # every time we need to set the screen background before drawing players to remove ghosting
+            screen.blit(assets.image('background'), (0, 0))
+            self.profiler.lap(frame_profiler.BACKGROUND)
+            rects = self.draw_sprites(alpha)
+            # display.update() will update any change happened on the screen
+            pygame.display.update()
+        else:
+            # only the areas drawn in the previous frame need the background restored to remove ghosting
+            background_img = assets.image('background')
+            screen.blits([(background_img, rect, rect) for rect in self.dirty_rects], doreturn=False)
+            self.profiler.lap(frame_profiler.BACKGROUND)
+            rects = self.draw_sprites(alpha)
+            # pushing just the changed areas
+            pygame.display.update(self.dirty_rects + rects)
+        self.profiler.lap(frame_profiler.DISPLAY_UPDATE)
+        self.dirty_rects = rects
 
     def game_loop(self) -> None:
         # game loop, A loop to keep the window alive starts
         while self.running:
-            # locking to a certain fps
-            self.clock.tick(FPS)
-
-            # every time we need to set the screen background before drawing players to remove ghosting
-            # screen.fill((255, 255, 255))
-            screen.blit(background_img, (0, 0))
+            # locking the rendering to a certain fps, the elapsed time feeds the fixed step simulation
+            self.accumulator += min(self.clock.tick(FPS) / 1000, MAX_FRAME_TIME)
+            # the time spent waiting in tick() is not part of the frame
+            self.profiler.start_frame()
 
             for event in pygame.event.get():
                 # pygame.event.get() gets event from the Event Queue
-                if event.type == pygame.WINDOWCLOSE:
-                    # checks if the event is a window close button pressed event
-                    self.running = False
-
-                # checking for keyboard key stroke events
-                if event.type == pygame.KEYDOWN:
-                    # KEYDOWN is used to check a button down (press) event
-                    if event.key == pygame.K_a or event.key == pygame.K_LEFT:
-                        # event is a dict type object with a 'key' as a key and keyboard button code as the value
-                        # left movement
-                        self.player.player_x_change = -PLAYER_MOVE
-                    if event.key == pygame.K_d or event.key == pygame.K_RIGHT:
-                        # right movement
-                        self.player.player_x_change = PLAYER_MOVE
-                    if event.key == pygame.K_SPACE:
-                        # fire laser
-                        if not self.player_laser.laser_player_fire:
-                            self.player_laser.laser_player_fire = True
-                            self.player_laser.laser_player_x = self.player.player_x
-
-                elif event.type == pygame.KEYUP:
-                    if event.key == pygame.K_a or event.key == pygame.K_d or event.key == pygame.K_LEFT or pygame.K_RIGHT:
-                        self.player.player_x_change = 0
-
-            self.player.player_movement()
-            self.player_laser.laser_movement()
-            self.enemy.enemy_movement(self.player_laser, self.score)
-            self.score.show_score()
+                self.handle_live_event(event)
+            self.profiler.lap(frame_profiler.EVENTS)
 
-            # display.update() will update any change happened on the screen
-            pygame.display.update()
+            # a replay stops at its last tick even when one frame owes several catch-up ticks
+            while self.accumulator >= TICK_TIME and (self.replay is None or self.ticks < self.replay.ticks):
+                self.update()
+                self.accumulator -= TICK_TIME
+            if self.replay is not None and self.ticks >= self.replay.ticks:
+                self.running = False
+
+            # the leftover time is drawn as a fraction of the next tick
+            self.render(self.accumulator / TICK_TIME)
+            self.profiler.end_frame()
+        self.profiler.close()
+
+    def run_headless(self, ticks: int) -> int:
+        for _ in range(ticks):
+            self.autopilot()
+            self.update()
+        return self.score.total_score
+
+
+def run_headless_games(games: int, ticks: int, seed: int, enemy_count=ENEMY_COUNT, fire_mode='single') -> list:
+    """
+    runs seeded games back to back as fast as the CPU allows
+    game i is seeded with seed + i so any single game can be reproduced
+    :param games: number of games to simulate
+    :param ticks: number of simulation ticks per game
+    :param seed: seed of the first game
+    :param enemy_count: number of enemies in the wave
+    :param fire_mode: key of FIRE_MODES
+    :return: list of final scores
+    """
+
+    scores = []
+    for i in range(games):
+        random.seed(seed + i)
+        scores.append(Game(enemy_count, fire_mode=fire_mode).run_headless(ticks))
+    return scores
 
 
-game = Game()
-game.game_loop()
-pygame.quit()
+def init_display() -> pygame.Surface:
+    """
+    initialises only the pygame subsystems the game uses and opens the window
+    the display subsystem also starts the event subsystem, the mixer and joysticks are never started
+    :return: the display Surface
+    """
+
+    global screen
+    pygame.display.init()
+    pygame.font.init()
+    # creating the display Surface of 800x600 size
+    screen = pygame.display.set_mode(size=SCREEN_SIZE)
+    pygame.display.set_caption('Space Invader')  # setting the title
+    return screen
+
+
+def load_assets() -> bool:
+    """
+    loads the startup images on a background thread while the window shows a loading screen
+    :return: False when the window was closed before loading finished
+    """
+
+    errors = []
+
+    def preload():
+        try:
+            assets.preload(STARTUP_IMAGES)
+        except Exception as error:  # re-raised on the main thread
+            errors.append(error)
+
+    loader = threading.Thread(target=preload, name='asset-loader', daemon=True)
+    loader.start()
+    font = assets.font(*HUD_FONT)
+    clock = pygame.time.Clock()
+    while loader.is_alive():
+        for event in pygame.event.get():
+            if event.type == pygame.WINDOWCLOSE:
+                # the loader may be inside convert(), pygame.quit() must wait until it is done with the display
+                loader.join()
+                return False
+        screen.fill((0, 0, 0))
+        text = font.render(f'Loading {assets.progress:.0%}', True, (255, 255, 255))
+        screen.blit(text, text.get_rect(center=screen.get_rect().center))
+        pygame.display.update()
+        clock.tick(FPS)
+    loader.join()
+    if errors:
+        raise errors[0]
+    pygame.display.set_icon(assets.image('icon'))
+    return True
+
+
+def positive_int(text: str) -> int:
+    """
+    argparse type of the counts that must be at least 1
+    :param text: the argument
+    :return: int
+    """
+
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected a whole number, got {text!r}') from None
+    if value < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1, got {value}')
+    return value
+
+
+def frame_window(text: str) -> tuple:
+    """
+    argparse type of --cprofile
+    :param text: START:END
+    :return: tuple of (START, END) frame numbers, 0 <= START < END
+    """
+
+    start, _, end = text.partition(':')
+    try:
+        window = int(start), int(end)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected START:END frame numbers, got {text!r}') from None
+    if not 0 <= window[0] < window[1]:
+        raise argparse.ArgumentTypeError(f'START must be at least 0 and below END, got {text!r}')
+    return window
+
+
+def main(argv=None) -> None:
+    """
+    entry point of the game
+    :param argv: command line arguments, sys.argv[1:] when None
+    """
+
+    started = time.perf_counter()
+    parser = argparse.ArgumentParser(description='Space Invader')
+    parser.add_argument('--headless', action='store_true', help='run the simulation without a display')
+    parser.add_argument('--games', type=positive_int, default=1000, help='number of seeded games to simulate')
+    parser.add_argument('--ticks', type=int, default=60 * TICK_RATE, help='simulation ticks per game')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    parser.add_argument('--enemies', type=positive_int, default=ENEMY_COUNT, help='number of enemies in the wave')
+    parser.add_argument('--full-redraw', action='store_true',
+                        help='redraw and push the whole screen every frame instead of the changed areas')
+    parser.add_argument('--show-fps', action='store_true', help='show the FPS counter')
+    parser.add_argument('--fire-mode', choices=FIRE_MODES, default='single', help='how the player fires')
+    parser.add_argument('--profile', action='store_true', help='show the per phase frame timing overlay')
+    parser.add_argument('--profile-out', metavar='FILE', help='write the frame timings to a .csv or .json file on exit')
+    parser.add_argument('--cprofile', metavar='START:END', type=frame_window,
+                        help='run cProfile from frame START up to frame END')
+    parser.add_argument('--cprofile-out', metavar='FILE', default='frames.prof', help='cProfile stats file')
+    parser.add_argument('--record', metavar='FILE', help='record the game input to a replay file')
+    parser.add_argument('--replay', metavar='FILE', help='play a replay file instead of the keyboard input')
+    parser.add_argument('--startup-time', action='store_true',
+                        help='print how long the window, the assets and the first frame took, then quit')
+    parser.add_argument('--server', action='store_true', help='host a LAN game, the server has no window')
+    parser.add_argument('--connect', metavar='HOST[:PORT]', help='join a LAN game')
+    parser.add_argument('--port', type=int, default=NET_PORT, help='port the server listens on')
+    parser.add_argument('--players', type=int, choices=range(1, MAX_PLAYERS + 1), default=1,
+                        help='players the server waits for before the match starts')
+    parser.add_argument('--match-ticks', type=int, default=0,
+                        help='ticks a LAN match lasts, 0 runs it until every player left')
+    parser.add_argument('--autopilot', action='store_true', help='the LAN client plays by itself')
+    parser.add_argument('--net-loss', metavar='PERCENT', type=float, default=0.0,
+                        help='drop this percentage of the outgoing packets, to test a bad network')
+    parser.add_argument('--net-delay', metavar='MS', type=float, default=0.0,
+                        help='hold every outgoing packet back this many milliseconds, to test a bad network')
+    parser.add_argument('--net-stats', metavar='FILE',
+                        help='write the LAN bandwidth and latency figures to a JSON file on exit')
+    args = parser.parse_args(argv)
+    if args.server:
+        if args.enemies > MAX_NET_ENEMIES:
+            parser.error(f'a LAN game has at most {MAX_NET_ENEMIES} enemies, a full snapshot must fit in a datagram')
+        # the LAN game is only imported when it is played
+        from lan_game import ServerGame
+        from netplay import NetLink
+        random.seed(args.seed)
+        server = ServerGame(NetLink(('', args.port), args.net_loss / 100, args.net_delay / 1000),
+                            args.enemies, args.fire_mode, args.players)
+        server.run(args.match_ticks)
+        server.report(args.net_stats)
+        return
+    if args.headless:
+        scores = run_headless_games(args.games, args.ticks, args.seed, args.enemies, args.fire_mode)
+        print(f'games: {len(scores)}  mean score: {sum(scores) / len(scores):.2f}  '
+              f'min: {min(scores)}  max: {max(scores)}')
+        return
+
+    client = None
+    if args.connect:
+        from lan_game import ClientGame
+        from netplay import NetLink, resolve
+        client = ClientGame(NetLink(loss=args.net_loss / 100, delay=args.net_delay / 1000), resolve(args.connect),
+                            assets, args.autopilot)
+        if not client.connect():
+            parser.exit(1, f'no game to join at {args.connect}\n')
+
+    replay = recorder = None
+    if args.replay:
+        replay = Replay.load(args.replay)
+        if replay.tick_rate != TICK_RATE:
+            parser.error(f'{args.replay} was recorded at {replay.tick_rate} ticks per second, not {TICK_RATE}')
+        random.seed(replay.seed)
+        args.enemies, args.fire_mode = replay.enemy_count, replay.fire_mode
+    elif args.record:
+        recorder = Replay(args.seed, args.enemies, args.fire_mode, TICK_RATE)
+        random.seed(args.seed)
+
+    # the window is shown first, the assets load behind the loading screen
+    init_display()
+    window_shown = time.perf_counter()
+    if not load_assets():
+        pygame.quit()
+        return
+    assets_loaded = time.perf_counter()
+
+    if client is not None:
+        client.game_loop(screen)
+        client.report(args.net_stats)
+        pygame.quit()
+        return
+
+    profiler = frame_profiler.NULL_PROFILER
+    if args.profile or args.profile_out or args.cprofile:
+        profiler = frame_profiler.FrameProfiler(
+            font=pygame.font.SysFont('dejavusansmono,couriernew,monospace', 14) if args.profile else None,
+            dump_path=args.profile_out,
+            cprofile_window=args.cprofile,
+            cprofile_path=args.cprofile_out)
+    game = Game(args.enemies, args.full_redraw, args.show_fps, args.fire_mode, profiler, replay, recorder)
+    if args.startup_time:
+        game.render(0.0)
+        first_frame = time.perf_counter()
+        print(f'window: {(window_shown - started) * 1000:.1f} ms  '
+              f'assets: {(assets_loaded - started) * 1000:.1f} ms  '
+              f'first frame: {(first_frame - started) * 1000:.1f} ms')
+        pygame.quit()
+        return
+
+    game.game_loop()
+    if recorder is not None:
+        recorder.ticks = game.ticks
+        recorder.save(args.record)
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
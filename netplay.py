@@ -0,0 +1,448 @@
+import errno
+import heapq
+import random
+import socket
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from replay import read_varint, write_varint
+
+NET_PORT = 50007
+NET_MAGIC = b'GWN1'
+MAX_PLAYERS = 4
+PACKET_SIZE = 65536  # receive buffer, larger than any UDP datagram
+MAX_DATAGRAM = 65507  # largest UDP payload over IPv4, a larger packet fails to send
+# a full snapshot of this many enemies far off screen and of full projectile pools is still below MAX_DATAGRAM
+MAX_NET_ENEMIES = 2048
+SNAPSHOT_INTERVAL = 2  # server ticks between snapshots
+SNAPSHOT_HISTORY = 64  # snapshots kept on both sides as delta baselines
+INTERPOLATION_DELAY = 3 * SNAPSHOT_INTERVAL  # ticks the remote entities are drawn behind the newest snapshot
+INPUT_REDUNDANCY = 8  # inputs repeated in every input packet, a lost packet is covered by the next ones
+INPUT_BACKLOG = 4  # inputs the server buffers per client before it drops the oldest
+POSITION_SCALE = 8  # positions travel as integers in 1/8 px
+NO_BASELINE = 0xFFFFFFFF  # baseline tick of a full snapshot, ack tick before the first snapshot
+NET_TIMEOUT = 5.0  # seconds without a packet before the other side is given up
+MAX_FIELD_LENGTH = PACKET_SIZE  # a snapshot field can't have more elements than a datagram has bytes
+
+# message types, the first byte of every packet
+MSG_HELLO = 0
+MSG_WELCOME = 1
+MSG_INPUT = 2
+MSG_SNAPSHOT = 3
+MSG_BYE = 4
+
+# packet layouts, little endian:
+#   hello       type, magic
+#   welcome     type, player slot, tick rate, snapshot interval, server tick
+#   input       type, newest snapshot tick received, sequence number of the newest input, input count,
+#               then one byte of INPUT_* bits per input, oldest first
+#   snapshot    type, tick, baseline tick, then every field of SNAPSHOT_FIELDS encoded by encode_field()
+#   bye         type
+HELLO = struct.Struct('<B4s')
+WELCOME = struct.Struct('<BBHHI')
+INPUT_HEADER = struct.Struct('<BIIB')
+SNAPSHOT_HEADER = struct.Struct('<BII')
+
+# input bits
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_FIRE = 4
+
+# every field is an int32 array, positions are multiplied by POSITION_SCALE
+# the shots of a slot are its projectile pool cut after the last live shot, a free pool slot has x = y = 0
+SNAPSHOT_FIELDS = ('enemy_x', 'enemy_y', 'player_active', 'player_x', 'player_score', 'player_input') + tuple(
+    f'laser_{axis}{slot}' for slot in range(MAX_PLAYERS) for axis in 'xy')
+
+# field delta modes, the high nibble of the flag byte, the low nibble is the byte width of the deltas
+DELTA_NONE = 0  # no element changed
+DELTA_SAME = 1  # every element changed by the same delta, which is sent once
+DELTA_ALL = 2  # every element changed, one delta per element
+DELTA_MASK = 3  # a bit mask of the changed elements, then their deltas
+DELTA_INDEX = 4  # varint gaps between the changed elements, then their deltas
+DELTA_WIDTHS = {1: np.dtype('<i1'), 2: np.dtype('<i2'), 4: np.dtype('<i4')}
+
+
+def quantize(values) -> np.ndarray:
+    return np.rint(np.asarray(values, dtype=np.float64) * POSITION_SCALE).astype(np.int32)
+
+
+def dequantize(values: np.ndarray) -> np.ndarray:
+    return values / POSITION_SCALE
+
+
+def delta_width(deltas: np.ndarray) -> int:
+    low, high = int(deltas.min()), int(deltas.max())
+    for width in (1, 2):
+        limit = 1 << (8 * width - 1)
+        if -limit <= low and high < limit:
+            return width
+    return 4
+
+
+def varint_sizes(values: np.ndarray) -> int:
+    return int(len(values) + sum(int((values >= 1 << shift).sum()) for shift in (7, 14, 21, 28)))
+
+
+def resize(values: np.ndarray, length: int) -> np.ndarray:
+    # the baseline of a field that grew is padded with zeros, the free slots value
+    resized = np.zeros(length, dtype=np.int32)
+    count = min(length, len(values))
+    resized[:count] = values[:count]
+    return resized
+
+
+def encode_field(data: bytearray, values: np.ndarray, baseline: np.ndarray) -> None:
+    """
+    appends one field as its difference from the baseline, in the cheapest of the DELTA_* modes
+    :param data: packet being built
+    :param values: int32 array to send
+    :param baseline: the same field in the snapshot the client has, empty for a full snapshot
+    """
+
+    length = len(values)
+    write_varint(data, length)
+    if not length:
+        return
+    delta = values - resize(baseline, length)
+    changed = np.flatnonzero(delta)
+    if not changed.size:
+        data.append(DELTA_NONE << 4)
+        return
+    deltas = delta[changed]
+    width = delta_width(deltas)
+    if changed.size == length and (deltas == deltas[0]).all():
+        # the enemy formation moves as one, so its x coordinates usually cost a single delta
+        data.append(DELTA_SAME << 4 | width)
+        data += deltas[:1].astype(DELTA_WIDTHS[width]).tobytes()
+        return
+    if changed.size == length:
+        data.append(DELTA_ALL << 4 | width)
+    else:
+        gaps = np.diff(changed, prepend=-1) - 1
+        mask_size = (length + 7) // 8
+        if varint_sizes(np.append(gaps, changed.size)) < mask_size:
+            data.append(DELTA_INDEX << 4 | width)
+            write_varint(data, changed.size)
+            for gap in gaps.tolist():
+                write_varint(data, gap)
+        else:
+            data.append(DELTA_MASK << 4 | width)
+            mask = np.zeros(length, dtype=bool)
+            mask[changed] = True
+            data += np.packbits(mask).tobytes()
+    data += deltas.astype(DELTA_WIDTHS[width]).tobytes()
+
+
+def read_bytes(data: bytes, offset: int, size: int) -> int:
+    """
+    checks that size bytes follow the offset
+    :return: offset after them
+    """
+
+    if offset + size > len(data):
+        raise ValueError('truncated packet')
+    return offset + size
+
+
+def decode_field(data: bytes, offset: int, baseline: np.ndarray) -> tuple:
+    """
+    :return: tuple of (int32 array, offset after the field)
+    :raises ValueError: when the field is malformed or truncated
+    """
+
+    length, offset = read_varint(data, offset)
+    if length > MAX_FIELD_LENGTH:
+        raise ValueError(f'field of {length} elements')
+    values = resize(baseline, length)
+    if not length:
+        return values, offset
+    offset = read_bytes(data, offset, 1)
+    mode, width = data[offset - 1] >> 4, data[offset - 1] & 0x0F
+    if mode == DELTA_NONE:
+        return values, offset
+    if mode > DELTA_INDEX or width not in DELTA_WIDTHS:
+        raise ValueError(f'unknown field flags {data[offset - 1]:#04x}')
+    dtype = DELTA_WIDTHS[width]
+    if mode == DELTA_SAME:
+        read_bytes(data, offset, width)
+        values += np.frombuffer(data, dtype, 1, offset)[0]
+        return values, offset + width
+    if mode == DELTA_ALL:
+        changed = np.arange(length)
+    elif mode == DELTA_MASK:
+        mask_size = (length + 7) // 8
+        read_bytes(data, offset, mask_size)
+        mask = np.unpackbits(np.frombuffer(data, np.uint8, mask_size, offset))[:length]
+        changed = np.flatnonzero(mask)
+        offset += mask_size
+    else:
+        count, offset = read_varint(data, offset)
+        if count > length:
+            raise ValueError(f'{count} changes in a field of {length} elements')
+        gaps = []
+        for _ in range(count):
+            gap, offset = read_varint(data, offset)
+            gaps.append(gap)
+        changed = np.cumsum(np.array(gaps, dtype=np.int64) + 1) - 1
+        if count and changed[-1] >= length:
+            raise ValueError('change past the end of the field')
+    read_bytes(data, offset, len(changed) * width)
+    values[changed] += np.frombuffer(data, dtype, len(changed), offset).astype(np.int32)
+    return values, offset + len(changed) * width
+
+
+def encode_snapshot(tick: int, state: dict, baseline_tick=NO_BASELINE, baseline=None) -> bytes:
+    """
+    builds a snapshot packet, delta-compressed against the baseline when there is one
+    :param tick: server tick of the state
+    :param state: maps every name of SNAPSHOT_FIELDS to an int32 array
+    :param baseline_tick: tick of the baseline, NO_BASELINE for a full snapshot
+    :param baseline: state the client acknowledged, None for a full snapshot
+    :return: bytes
+    """
+
+    data = bytearray(SNAPSHOT_HEADER.pack(MSG_SNAPSHOT, tick, baseline_tick if baseline is not None else NO_BASELINE))
+    empty = np.empty(0, dtype=np.int32)
+    for name in SNAPSHOT_FIELDS:
+        encode_field(data, state[name], baseline[name] if baseline is not None else empty)
+    return bytes(data)
+
+
+def decode_snapshot(data: bytes, baselines: dict) -> tuple:
+    """
+    :param data: snapshot packet
+    :param baselines: states received earlier, by tick
+    :return: tuple of (tick, state), state is None when the baseline is no longer known
+    :raises ValueError: when the packet is malformed or truncated
+    """
+
+    read_bytes(data, 0, SNAPSHOT_HEADER.size)
+    _, tick, baseline_tick = SNAPSHOT_HEADER.unpack_from(data)
+    if baseline_tick == NO_BASELINE:
+        baseline = None
+    else:
+        baseline = baselines.get(baseline_tick)
+        if baseline is None:
+            return tick, None
+    offset = SNAPSHOT_HEADER.size
+    empty = np.empty(0, dtype=np.int32)
+    state = {}
+    try:
+        for name in SNAPSHOT_FIELDS:
+            state[name], offset = decode_field(data, offset, baseline[name] if baseline is not None else empty)
+    except IndexError:
+        # a varint running past the end of the packet
+        raise ValueError('truncated packet') from None
+    return tick, state
+
+
+def state_checksum(state: dict) -> int:
+    checksum = 0
+    for name in SNAPSHOT_FIELDS:
+        checksum = zlib.crc32(state[name].astype('<i4').tobytes(), zlib.crc32(name.encode('ascii'), checksum))
+    return checksum
+
+
+def encode_input(ack: int, seq: int, inputs: list) -> bytes:
+    return INPUT_HEADER.pack(MSG_INPUT, ack, seq, len(inputs)) + bytes(inputs)
+
+
+def decode_input(data: bytes) -> tuple:
+    """
+    :return: tuple of (ack tick, sequence number of the newest input, list of input bits, oldest first)
+    :raises ValueError: when the packet is truncated
+    """
+
+    read_bytes(data, 0, INPUT_HEADER.size)
+    _, ack, seq, count = INPUT_HEADER.unpack_from(data)
+    read_bytes(data, INPUT_HEADER.size, count)
+    return ack, seq, list(data[INPUT_HEADER.size:INPUT_HEADER.size + count])
+
+
+def percentiles_ms(samples: list) -> dict:
+    """
+    :param samples: durations in seconds
+    :return: dict of the sample count and the p50, p95 and max in milliseconds
+    """
+
+    if not samples:
+        return {'count': 0, 'p50': None, 'p95': None, 'max': None}
+    p50, p95 = np.percentile(samples, (50, 95)) * 1000
+    return {'count': len(samples), 'p50': round(float(p50), 3), 'p95': round(float(p95), 3),
+            'max': round(max(samples) * 1000, 3)}
+
+
+class NetLink:
+    """
+    A class to send and receive datagrams on one non-blocking UDP socket and count the traffic
+    outgoing packets can be dropped and delayed on purpose to test a bad network on one machine
+    ...
+    Attributes
+    ----------
+    sock : socket
+    loss : float    fraction of the outgoing packets dropped
+    delay : float   seconds every outgoing packet is held back
+    random : Random     own generator, the game's random module must stay untouched for the seeded simulation
+    outbox : list   heap of (due time, order, data, address) of the delayed packets
+    bytes_sent, bytes_received : int    traffic of the dropped packets is not counted
+    packets_sent, packets_received : int
+    sent_to : dict  bytes sent to every address
+    send_errors : dict  count of the packets that failed to send, by error name
+
+    Methods
+    -------
+    send(data, address) -> None :   sends a packet now or once its delay ran out
+    flush() -> None :   sends the delayed packets that are due
+    drain() -> None :   waits until every delayed packet was sent
+    receive() -> list :     every (data, address) waiting on the socket
+    close() -> None
+    """
+    def __init__(self, address=('', 0), loss=0.0, delay=0.0, seed=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(address)
+        self.sock.setblocking(False)
+        self.loss = loss
+        self.delay = delay
+        self.random = random.Random(seed)
+        self.outbox = []
+        self.order = 0
+        self.bytes_sent = self.bytes_received = 0
+        self.packets_sent = self.packets_received = 0
+        self.sent_to = {}
+        self.send_errors = {}
+
+    def send(self, data: bytes, address: tuple) -> None:
+        if self.loss and self.random.random() < self.loss:
+            return
+        if self.delay:
+            self.order += 1
+            heapq.heappush(self.outbox, (time.perf_counter() + self.delay, self.order, data, address))
+        else:
+            self.transmit(data, address)
+
+    def transmit(self, data: bytes, address: tuple) -> None:
+        try:
+            self.sock.sendto(data, address)
+        except ConnectionError:
+            # a peer that went away makes some systems report an error on the next send, the packet is lost
+            return
+        except OSError as error:
+            # EMSGSIZE for a packet larger than a datagram, counted so the stats show what never left
+            name = errno.errorcode.get(error.errno, str(error.errno))
+            self.send_errors[name] = self.send_errors.get(name, 0) + 1
+            return
+        self.bytes_sent += len(data)
+        self.packets_sent += 1
+        self.sent_to[address] = self.sent_to.get(address, 0) + len(data)
+
+    def flush(self) -> None:
+        now = time.perf_counter()
+        while self.outbox and self.outbox[0][0] <= now:
+            _, _, data, address = heapq.heappop(self.outbox)
+            self.transmit(data, address)
+
+    def drain(self) -> None:
+        while self.outbox:
+            time.sleep(max(0.0, self.outbox[0][0] - time.perf_counter()))
+            self.flush()
+
+    def receive(self) -> list:
+        self.flush()
+        packets = []
+        while True:
+            try:
+                data, address = self.sock.recvfrom(PACKET_SIZE)
+            except BlockingIOError:
+                return packets
+            except ConnectionResetError:
+                continue
+            self.bytes_received += len(data)
+            self.packets_received += 1
+            if data:
+                packets.append((data, address))
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+class Peer:
+    """
+    A class to hold the server's view of one client
+    inputs are applied one per tick in sequence order, the last one is repeated while the next is missing
+    ...
+    Attributes
+    ----------
+    address : tuple     address the client sends from
+    slot : int     player slot of the client
+    inputs : dict   input bits by sequence number, received but not applied yet
+    next_input : int    sequence number of the next input to apply
+    applied : int   sequence number of the last input applied, 0 before the first
+    bits : int  input bits applied last
+    acked : int     tick of the newest snapshot the client received, NO_BASELINE before the first
+    last_heard : float  when the last packet of the client arrived
+    snapshots : int     snapshots sent
+    snapshot_bytes : int    bytes of the snapshots sent
+    full_bytes : int    bytes the same snapshots would have taken without delta compression
+
+    Methods
+    -------
+    add_inputs(seq, inputs) -> None :   stores the inputs of a packet, seq is the sequence number of the last one
+    next_bits() -> int :    input bits for the coming tick
+    skip_inputs() -> None :     marks every received input as applied without applying it
+    """
+    def __init__(self, address: tuple, slot: int):
+        self.address = address
+        self.slot = slot
+        self.inputs = {}
+        self.next_input = 1
+        self.applied = 0
+        self.bits = 0
+        self.acked = NO_BASELINE
+        self.last_heard = time.perf_counter()
+        self.snapshots = 0
+        self.snapshot_bytes = 0
+        self.full_bytes = 0
+
+    def add_inputs(self, seq: int, inputs: list) -> None:
+        first = seq - len(inputs) + 1
+        for offset, bits in enumerate(inputs):
+            if first + offset >= self.next_input:
+                self.inputs[first + offset] = bits
+        if not self.inputs:
+            return
+        newest = max(self.inputs)
+        if newest - self.next_input >= INPUT_BACKLOG or (
+                self.next_input not in self.inputs and newest - self.next_input >= INPUT_REDUNDANCY):
+            # the client ran ahead of the server or an input was lost for good, skip to what has arrived
+            self.next_input = max(min(self.inputs), newest - INPUT_BACKLOG + 1)
+            self.inputs = {seq: bits for seq, bits in self.inputs.items() if seq >= self.next_input}
+
+    def next_bits(self) -> int:
+        bits = self.inputs.pop(self.next_input, None)
+        if bits is not None:
+            self.bits = bits
+            self.applied = self.next_input
+            self.next_input += 1
+        return self.bits
+
+    def skip_inputs(self) -> None:
+        if self.inputs:
+            newest = max(self.inputs)
+            self.bits = self.inputs[newest]
+            self.applied = newest
+            self.next_input = newest + 1
+            self.inputs = {}
+
+
+def resolve(address: str, port=NET_PORT) -> tuple:
+    """
+    :param address: HOST or HOST:PORT
+    :param port: port used when the address has none
+    :return: (IP address, port) tuple, as recvfrom() reports the sender
+    """
+
+    host, _, port_text = address.rpartition(':') if ':' in address else (address, '', '')
+    return socket.gethostbyname(host or 'localhost'), int(port_text) if port_text else port
@@ -0,0 +1,174 @@
+import numpy as np
+
+PROJECTILE_CAPACITY = 2048  # live shots per pool, a shot fired into a full pool is dropped
+# up to this high water mark update() steps Python floats, below it the per call cost of NumPy outweighs the loop
+FEW_SHOTS = 8
+
+
+class ProjectileType:
+    """
+    A class to describe one kind of projectile
+    ...
+    Attributes
+    ----------
+    name : str      name of the projectile type
+    speed : float   pixels per tick along the firing direction, negative moves up the screen
+    sprite : str    asset name of the projectile image
+    offset : tuple  drawing offset of the sprite from the projectile position
+    """
+    __slots__ = ('name', 'speed', 'sprite', 'offset')
+
+    def __init__(self, name: str, speed: float, sprite: str, offset=(0, 0)):
+        self.name = name
+        self.speed = speed
+        self.sprite = sprite
+        self.offset = offset
+
+
+class ProjectilePool:
+    """
+    A class to hold every live projectile of one side in preallocated arrays
+    a shot takes a slot from the free list and gives it back when it hits or leaves the screen,
+    so firing never creates a Python object per bullet
+    ...
+    Attributes
+    ----------
+    types : list    ProjectileType of every kind, a slot stores the index into this list
+    capacity : int  number of slots
+    bounds : tuple  (left, top, right, bottom), a shot is culled once it crosses one of them
+    x, y : ndarray of float     coordinates of every slot
+    prev_x, prev_y : ndarray of float   coordinates of every slot at the previous tick
+    vx, vy : ndarray of float   movement of every slot per tick
+    kind : ndarray of int   projectile type of every slot
+    alive : ndarray of bool     slots holding a live shot
+    free : ndarray of int   stack of free slots, the first free_count entries are valid
+    free_count : int    number of free slots
+    high_water : int    one past the last live slot, every array operation stops there
+    live : ndarray of int   live slots in the order collision_positions() returned them
+    culled, scratch : ndarray of bool   preallocated out= buffers of update()
+
+    Methods
+    -------
+    spawn(kind, xs, ys, angles) -> ndarray :    fires shots of one type, returns the slots used
+    kill(slots) -> None :   frees the slots
+    update() -> None :  moves every live shot by one tick and culls the ones that left the screen
+    update_few() -> None :  update() in a Python loop, used while the high water mark is at most FEW_SHOTS
+    live_slots() -> ndarray :   the live slots in ascending order
+    collision_positions() -> tuple :    coordinates of the live shots for the collision world
+    live_count() -> int :   number of live shots
+    draw(screen, image, alpha) -> list :    draws the live shots, returns the areas drawn
+    """
+    def __init__(self, types: list, bounds: tuple, capacity=PROJECTILE_CAPACITY):
+        self.types = types
+        self.capacity = capacity
+        self.bounds = bounds
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.prev_x = np.zeros(capacity)
+        self.prev_y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        # popping from the end hands out the low slots first
+        self.free = np.arange(capacity - 1, -1, -1, dtype=np.int64)
+        self.free_count = capacity
+        self.high_water = 0
+        self.live = np.empty(0, dtype=np.int64)
+        self.culled = np.zeros(capacity, dtype=bool)
+        self.scratch = np.zeros(capacity, dtype=bool)
+
+    def spawn(self, kind: int, xs, ys, angles=0.0) -> np.ndarray:
+        xs, ys, angles = np.broadcast_arrays(np.atleast_1d(xs), np.atleast_1d(ys), np.atleast_1d(angles))
+        count = min(len(xs), self.free_count)
+        slots = self.free[self.free_count - count:self.free_count][::-1].copy()
+        self.free_count -= count
+        speed = self.types[kind].speed
+        radians = np.radians(angles[:count])
+        self.x[slots] = self.prev_x[slots] = xs[:count]
+        self.y[slots] = self.prev_y[slots] = ys[:count]
+        # angle 0 moves straight along the y axis, positive angles lean to the shooter's right
+        self.vx[slots] = -speed * np.sin(radians)
+        self.vy[slots] = speed * np.cos(radians)
+        self.kind[slots] = kind
+        self.alive[slots] = True
+        if count:
+            self.high_water = max(self.high_water, int(slots.max()) + 1)
+        return slots
+
+    def kill(self, slots) -> None:
+        slots = np.unique(np.asarray(slots, dtype=np.int64))
+        slots = slots[self.alive[slots]]
+        self.alive[slots] = False
+        self.vx[slots] = self.vy[slots] = 0
+        self.free[self.free_count:self.free_count + len(slots)] = slots
+        self.free_count += len(slots)
+        live = self.live_slots()
+        self.high_water = int(live[-1]) + 1 if live.size else 0
+
+    def update(self) -> None:
+        end = self.high_water
+        if not end:
+            return
+        if end <= FEW_SHOTS:
+            self.update_few()
+            return
+        x, y = self.x[:end], self.y[:end]
+        self.prev_x[:end] = x
+        self.prev_y[:end] = y
+        # dead slots have no velocity, so the slots below the high water mark are moved without masking
+        x += self.vx[:end]
+        y += self.vy[:end]
+        left, top, right, bottom = self.bounds
+        out, scratch = self.culled[:end], self.scratch[:end]
+        np.less(x, left, out=out)
+        out |= np.greater(x, right, out=scratch)
+        out |= np.less_equal(y, top, out=scratch)
+        out |= np.greater_equal(y, bottom, out=scratch)
+        out &= self.alive[:end]
+        if out.any():
+            self.kill(np.flatnonzero(out))
+
+    def update_few(self) -> None:
+        # must stay step for step equal to the NumPy branch of update(), tests/test_projectiles.py compares the two
+        end = self.high_water
+        self.prev_x[:end] = self.x[:end]
+        self.prev_y[:end] = self.y[:end]
+        xs = [x + vx for x, vx in zip(self.x[:end].tolist(), self.vx[:end].tolist())]
+        ys = [y + vy for y, vy in zip(self.y[:end].tolist(), self.vy[:end].tolist())]
+        self.x[:end] = xs
+        self.y[:end] = ys
+        left, top, right, bottom = self.bounds
+        alive = self.alive[:end].tolist()
+        out = [slot for slot in range(end)
+               if alive[slot] and (xs[slot] < left or xs[slot] > right or ys[slot] <= top or ys[slot] >= bottom)]
+        if out:
+            self.kill(out)
+
+    def live_slots(self) -> np.ndarray:
+        return np.flatnonzero(self.alive[:self.high_water])
+
+    def collision_positions(self) -> tuple:
+        self.live = self.live_slots()
+        return self.x[self.live], self.y[self.live]
+
+    def live_count(self) -> int:
+        return self.capacity - self.free_count
+
+    def draw(self, screen, image, alpha=1.0) -> list:
+        rects = []
+        live = self.live_slots()
+        if not live.size:
+            return rects
+        xs = self.prev_x[live] + (self.x[live] - self.prev_x[live]) * alpha
+        ys = self.prev_y[live] + (self.y[live] - self.prev_y[live]) * alpha
+        kinds = self.kind[live]
+        for kind, projectile_type in enumerate(self.types):
+            mask = kinds == kind
+            if not mask.any():
+                continue
+            sprite = image(projectile_type.sprite)
+            offset_x, offset_y = projectile_type.offset
+            positions = zip((xs[mask] + offset_x).tolist(), (ys[mask] + offset_y).tolist())
+            rects += screen.blits([(sprite, position) for position in positions])
+        return rects
@@ -0,0 +1,116 @@
+import struct
+
+import pygame
+
+# file layout, little endian:
+#   header  magic, tick rate, seed, enemy count, length in ticks, event count, fire mode length, fire mode
+#   events  per event a varint of the ticks since the previous event and one code byte,
+#           bit 7 set is a key press, bits 0-6 index REPLAY_KEYS
+REPLAY_MAGIC = b'GWR1'
+REPLAY_HEADER = struct.Struct('<4sHIIIIB')
+REPLAY_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_a, pygame.K_d, pygame.K_SPACE)
+KEY_DOWN_BIT = 0x80
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, offset: int) -> tuple:
+    """
+    :return: tuple of (value, offset after the varint)
+    """
+
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class Replay:
+    """
+    A class to hold a recorded game: its seed, its settings and the key presses of every tick
+    ...
+    Attributes
+    ----------
+    seed : int  seed of the random module
+    enemy_count : int   number of enemies in the wave
+    fire_mode : str     fire mode of the player's gun
+    tick_rate : int     simulation ticks per second the replay was recorded at
+    ticks : int     length of the replay in ticks
+    events : list   (tick, pressed, key) tuples, sorted by tick
+
+    Methods
+    -------
+    record(tick, event) -> None :   appends a key event handled before the tick, ignores other events
+    events_at(tick) -> list :   pygame events to handle before the tick
+    to_bytes() -> bytes / from_bytes(data) -> Replay :    the compact binary form
+    save(path) -> None / load(path) -> Replay :     the binary form on disk
+    """
+    def __init__(self, seed=0, enemy_count=4, fire_mode='single', tick_rate=120, ticks=0, events=None):
+        self.seed = seed
+        self.enemy_count = enemy_count
+        self.fire_mode = fire_mode
+        self.tick_rate = tick_rate
+        self.ticks = ticks
+        self.events = events if events is not None else []
+        self.by_tick = None
+
+    def record(self, tick: int, event) -> None:
+        if event.type in (pygame.KEYDOWN, pygame.KEYUP) and event.key in REPLAY_KEYS:
+            self.events.append((tick, event.type == pygame.KEYDOWN, event.key))
+            self.by_tick = None
+
+    def events_at(self, tick: int) -> list:
+        if self.by_tick is None:
+            self.by_tick = {}
+            for event_tick, pressed, key in self.events:
+                event = pygame.event.Event(pygame.KEYDOWN if pressed else pygame.KEYUP, key=key)
+                self.by_tick.setdefault(event_tick, []).append(event)
+        return self.by_tick.get(tick, [])
+
+    def to_bytes(self) -> bytes:
+        fire_mode = self.fire_mode.encode('ascii')
+        data = bytearray(REPLAY_HEADER.pack(REPLAY_MAGIC, self.tick_rate, self.seed, self.enemy_count, self.ticks,
+                                            len(self.events), len(fire_mode)))
+        data += fire_mode
+        previous = 0
+        for tick, pressed, key in sorted(self.events, key=lambda event: event[0]):
+            write_varint(data, tick - previous)
+            data.append(REPLAY_KEYS.index(key) | (KEY_DOWN_BIT if pressed else 0))
+            previous = tick
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        magic, tick_rate, seed, enemy_count, ticks, event_count, mode_length = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ValueError('not a replay file')
+        offset = REPLAY_HEADER.size
+        fire_mode = data[offset:offset + mode_length].decode('ascii')
+        offset += mode_length
+        events = []
+        tick = 0
+        for _ in range(event_count):
+            delta, offset = read_varint(data, offset)
+            tick += delta
+            code = data[offset]
+            offset += 1
+            events.append((tick, bool(code & KEY_DOWN_BIT), REPLAY_KEYS[code & ~KEY_DOWN_BIT]))
+        return cls(seed, enemy_count, fire_mode, tick_rate, ticks, events)
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> 'Replay':
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pygame
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the game modules live in the repository root and the benchmark scripts in benchmarks/, neither is a package
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import _common  # noqa: F401  selects the dummy video driver and makes the repository root the working directory
+import main
+
+
+@pytest.fixture(scope='session')
+def display():
+    # opened once, main.assets keeps its fonts and images across tests and they die with pygame.quit()
+    main.init_display()
+    main.load_assets()
+    yield
+    pygame.quit()
+    main.screen = None
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+import collision
+from collision import CollisionWorld, first_hits
+from main import has_collided
+
+
+class Bodies:
+    """
+    A minimal collision body holding fixed coordinates
+    """
+    def __init__(self, xs, ys):
+        self.xs = np.asarray(xs, dtype=np.float64)
+        self.ys = np.asarray(ys, dtype=np.float64)
+
+    def collision_positions(self) -> tuple:
+        return self.xs, self.ys
+
+
+def make_world(a: Bodies, b: Bodies) -> CollisionWorld:
+    world = CollisionWorld()
+    world.register('a', a)
+    world.register('b', b)
+    return world
+
+
+def expected_pairs(a: Bodies, b: Bodies) -> list:
+    # the pairwise test the game used before the broadphase, in the order query() returns the pairs
+    return [(i, j) for j in range(len(b.xs)) for i in range(len(a.xs))
+            if has_collided(a.xs[i], a.ys[i], b.xs[j], b.ys[j])]
+
+
+@pytest.fixture(params=['all_pairs', 'grid'])
+def path(request, monkeypatch):
+    # every test runs against both the small layer path and the grid
+    monkeypatch.setattr(collision, 'BRUTE_FORCE_PAIRS', 1 << 62 if request.param == 'all_pairs' else 0)
+    return request.param
+
+
+@pytest.mark.parametrize('dx, dy, hit', [
+    (50.0, 0.0, False),
+    (49.999, 0.0, True),
+    (0.0, -50.0, False),
+    (0.0, -49.999, True),
+    (-50.0, 0.0, False),
+    (30.0, 40.0, False),
+    (29.999, 40.0, True),
+    (0.0, 0.0, True),
+])
+def test_radius_boundary(path, dx, dy, hit):
+    assert has_collided(100.0 + dx, 300.0 + dy, 100.0, 300.0) is hit
+    idx_a, idx_b = make_world(Bodies([100.0 + dx], [300.0 + dy]), Bodies([100.0], [300.0])).query('a', 'b')
+    assert list(zip(idx_a.tolist(), idx_b.tolist())) == ([(0, 0)] if hit else [])
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('count_a, count_b', [(300, 40), (40, 300)])
+def test_query_matches_has_collided(path, seed, count_a, count_b):
+    # the larger layer forms the grid, either side can be the larger one
+    rng = np.random.default_rng(seed)
+    a = Bodies(rng.uniform(-20, 760, count_a), rng.uniform(0, 600, count_a))
+    b = Bodies(rng.uniform(0, 800, count_b), rng.uniform(0, 600, count_b))
+    # some bodies exactly on and just inside the radius
+    a.xs[:3] = b.xs[:3] + np.array([50.0, 49.999, 0.0])
+    a.ys[:3] = b.ys[:3] + np.array([0.0, 0.0, -50.0])
+    idx_a, idx_b = make_world(a, b).query('a', 'b')
+    assert list(zip(idx_a.tolist(), idx_b.tolist())) == expected_pairs(a, b)
+
+
+def test_negative_cells(path):
+    # bodies left of and above the origin land in negative grid cells
+    a = Bodies([-10.0, -120.0, -60.0], [-10.0, 5.0, -80.0])
+    b = Bodies([10.0, -100.0, 500.0], [10.0, 20.0, 500.0])
+    idx_a, idx_b = make_world(a, b).query('a', 'b')
+    assert list(zip(idx_a.tolist(), idx_b.tolist())) == expected_pairs(a, b)
+
+
+def test_empty_layer(path):
+    idx_a, idx_b = make_world(Bodies([], []), Bodies([1.0], [1.0])).query('a', 'b')
+    assert idx_a.size == idx_b.size == 0
+    assert CollisionWorld().query('a', 'b')[0].size == 0
+
+
+def test_first_hits():
+    # enemy 0 is reached by shots 0 and 1, shot 1 also reaches enemy 1
+    idx_a, idx_b = first_hits(np.array([0, 0, 1]), np.array([0, 1, 1]))
+    assert idx_a.tolist() == [0] and idx_b.tolist() == [0]
+    idx_a, idx_b = first_hits(np.array([1, 0, 1]), np.array([0, 1, 2]))
+    assert idx_a.tolist() == [1, 0] and idx_b.tolist() == [0, 1]
@@ -0,0 +1,31 @@
+import random
+
+import numpy as np
+import pytest
+
+import main
+
+
+def run_wave(count: int, small: bool, ticks: int, monkeypatch) -> list:
+    # SMALL_WAVE picks the path, both waves spawn from the same seed
+    monkeypatch.setattr(main, 'SMALL_WAVE', count if small else 0)
+    random.seed(count)
+    enemy = main.Enemy(count)
+    states = []
+    for _ in range(ticks):
+        enemy.move_enemies()
+        states.append((enemy.enemy_x.copy(), enemy.enemy_y.copy(), enemy.prev_enemy_x.copy(),
+                       enemy.prev_enemy_y.copy(), enemy.enemy_x_change))
+    return states
+
+
+@pytest.mark.parametrize('count', [1, 4, main.SMALL_WAVE])
+def test_small_wave_matches_the_vectorized_step(count, monkeypatch):
+    # long enough for the formation to bounce off both walls a few times
+    small = run_wave(count, True, 3000, monkeypatch)
+    vectorized = run_wave(count, False, 3000, monkeypatch)
+    assert len({state[4] for state in small}) == 2
+    for tick, (expected, actual) in enumerate(zip(vectorized, small)):
+        for expected_field, actual_field in zip(expected[:4], actual[:4]):
+            assert np.array_equal(expected_field, actual_field), f'tick {tick}'
+        assert expected[4] == actual[4], f'tick {tick}'
@@ -0,0 +1,20 @@
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize('argv', [
+    ['--headless', '--enemies', '0'],
+    ['--headless', '--games', '0'],
+    ['--headless', '--games', '-3'],
+])
+def test_counts_below_one_are_rejected(argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main.main(argv)
+    assert exit_info.value.code == 2
+    assert 'must be at least 1' in capsys.readouterr().err
+
+
+def test_headless_single_enemy(capsys):
+    main.main(['--headless', '--games', '1', '--ticks', '60', '--enemies', '1'])
+    assert capsys.readouterr().out.startswith('games: 1 ')
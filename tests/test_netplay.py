@@ -0,0 +1,171 @@
+import numpy as np
+import pytest
+
+import netplay
+from netplay import (DELTA_ALL, DELTA_INDEX, DELTA_MASK, DELTA_NONE, DELTA_SAME, INPUT_BACKLOG, MSG_SNAPSHOT,
+                     NO_BASELINE, SNAPSHOT_FIELDS, SNAPSHOT_HEADER, Peer)
+from replay import read_varint, write_varint
+
+
+def field(values) -> np.ndarray:
+    return np.array(values, dtype=np.int32)
+
+
+def encode(values: np.ndarray, baseline: np.ndarray) -> bytes:
+    data = bytearray()
+    netplay.encode_field(data, values, baseline)
+    return bytes(data)
+
+
+def flags(data: bytes) -> tuple:
+    # (mode, width) of a field, the flag byte follows the length varint
+    _, offset = read_varint(data, 0)
+    return data[offset] >> 4, data[offset] & 0x0F
+
+
+def make_state(rng, enemies=40, shots=6) -> dict:
+    state = {name: field(rng.integers(-6400, 6400, shots)) for name in SNAPSHOT_FIELDS}
+    state.update(enemy_x=field(rng.integers(0, 6400, enemies)), enemy_y=field(rng.integers(0, 4800, enemies)),
+                 player_active=field([1, 1, 0, 0]), player_x=field([3000, 1200, 0, 0]),
+                 player_score=field([3, 12, 0, 0]), player_input=field([0, 5, 0, 0]))
+    return state
+
+
+def assert_same_state(expected: dict, actual: dict) -> None:
+    assert list(actual) == list(SNAPSHOT_FIELDS)
+    for name in SNAPSHOT_FIELDS:
+        assert actual[name].dtype == np.int32
+        assert np.array_equal(expected[name], actual[name]), name
+
+
+BASELINE = field(np.arange(64) * 8)
+CHANGED_EVERY_OTHER = BASELINE.copy()
+CHANGED_EVERY_OTHER[::2] += 3
+CHANGED_ONCE = field(np.arange(1000))
+CHANGED_ONCE[700] -= 9
+
+
+@pytest.mark.parametrize('values, baseline, mode, width', [
+    (BASELINE, BASELINE, DELTA_NONE, 0),
+    (BASELINE + 5, BASELINE, DELTA_SAME, 1),
+    (BASELINE - 40000, BASELINE, DELTA_SAME, 4),
+    (BASELINE + np.arange(1, 65), BASELINE, DELTA_ALL, 1),
+    (BASELINE * 3 + 1, BASELINE, DELTA_ALL, 2),
+    (CHANGED_EVERY_OTHER, BASELINE, DELTA_MASK, 1),
+    (CHANGED_ONCE, field(np.arange(1000)), DELTA_INDEX, 1),
+    # a field that grew is compared with its baseline padded by zeros, one that shrank with its cut baseline
+    (field(np.arange(100) * 8), BASELINE, DELTA_MASK, 2),
+    (BASELINE[:10] + 5, BASELINE, DELTA_SAME, 1),
+    (BASELINE[:10], BASELINE, DELTA_NONE, 0),
+    (field([7, -3, 900]), field([]), DELTA_ALL, 2),
+])
+def test_field_round_trip(values, baseline, mode, width):
+    data = encode(values, baseline)
+    assert flags(data) == (mode, width)
+    decoded, offset = netplay.decode_field(data, 0, baseline)
+    assert offset == len(data)
+    assert np.array_equal(decoded, values)
+
+
+def test_empty_field_is_only_its_length():
+    data = encode(field([]), BASELINE)
+    assert data == b'\x00'
+    decoded, offset = netplay.decode_field(data, 0, BASELINE)
+    assert decoded.size == 0 and offset == 1
+
+
+def test_snapshot_round_trip():
+    rng = np.random.default_rng(3)
+    baseline = make_state(rng)
+    state = make_state(rng, enemies=25, shots=9)
+    state['enemy_x'] = baseline['enemy_x'][:25] + 16
+    state['enemy_y'] = baseline['enemy_y'][:25]
+    full = netplay.encode_snapshot(120, baseline)
+    tick, decoded = netplay.decode_snapshot(full, {})
+    assert tick == 120
+    assert_same_state(baseline, decoded)
+    delta = netplay.encode_snapshot(122, state, 120, baseline)
+    assert len(delta) < len(netplay.encode_snapshot(122, state))
+    tick, decoded = netplay.decode_snapshot(delta, {120: baseline})
+    assert tick == 122
+    assert_same_state(state, decoded)
+    assert netplay.state_checksum(decoded) == netplay.state_checksum(state)
+
+
+def test_snapshot_against_a_forgotten_baseline():
+    state = make_state(np.random.default_rng(4))
+    delta = netplay.encode_snapshot(122, state, 120, state)
+    assert netplay.decode_snapshot(delta, {118: state}) == (122, None)
+
+
+def test_truncated_snapshot():
+    rng = np.random.default_rng(5)
+    baseline = make_state(rng)
+    for data, baselines in ((netplay.encode_snapshot(120, baseline), {}),
+                            (netplay.encode_snapshot(122, make_state(rng), 120, baseline), {120: baseline})):
+        for size in range(len(data)):
+            with pytest.raises(ValueError):
+                netplay.decode_snapshot(data[:size], baselines)
+
+
+def garbage_field(*parts) -> bytes:
+    data = bytearray(SNAPSHOT_HEADER.pack(MSG_SNAPSHOT, 120, NO_BASELINE))
+    for part in parts:
+        if isinstance(part, int):
+            write_varint(data, part)
+        else:
+            data += part
+    return bytes(data)
+
+
+@pytest.mark.parametrize('data', [
+    garbage_field(4, bytes([5 << 4 | 1])),  # unknown mode
+    garbage_field(4, bytes([DELTA_ALL << 4 | 3])),  # unknown width
+    garbage_field(netplay.MAX_FIELD_LENGTH + 1),  # longer than any datagram
+    garbage_field(4, bytes([DELTA_INDEX << 4 | 1]), 5),  # more changes than elements
+    garbage_field(4, bytes([DELTA_INDEX << 4 | 1]), 1, 4, b'\x01'),  # change past the end
+    garbage_field(4, bytes([DELTA_MASK << 4 | 2]), b'\xf0', b'\x01\x00' * 3),  # mask with too few deltas
+    garbage_field(4, b'\x80'),  # varint running past the end
+    b'\x03\x00',  # shorter than the header
+])
+def test_garbage_snapshot(data):
+    with pytest.raises(ValueError):
+        netplay.decode_snapshot(data, {})
+
+
+def test_input_round_trip_and_truncation():
+    data = netplay.encode_input(NO_BASELINE, 17, [1, 5, 2])
+    assert netplay.decode_input(data) == (NO_BASELINE, 17, [1, 5, 2])
+    for size in range(len(data)):
+        with pytest.raises(ValueError):
+            netplay.decode_input(data[:size])
+
+
+def test_inputs_within_the_backlog_are_kept():
+    peer = Peer(('127.0.0.1', 1), 0)
+    peer.add_inputs(INPUT_BACKLOG, list(range(1, INPUT_BACKLOG + 1)))
+    assert [peer.next_bits() for _ in range(INPUT_BACKLOG)] == list(range(1, INPUT_BACKLOG + 1))
+    assert peer.applied == INPUT_BACKLOG
+
+
+def test_inputs_past_the_backlog_drop_the_oldest():
+    peer = Peer(('127.0.0.1', 1), 0)
+    peer.add_inputs(10, list(range(1, 11)))
+    assert sorted(peer.inputs) == list(range(11 - INPUT_BACKLOG, 11))
+    assert peer.next_input == 11 - INPUT_BACKLOG
+    assert peer.next_bits() == 11 - INPUT_BACKLOG
+    # the redundant copies of the dropped inputs in later packets are ignored
+    peer.add_inputs(12, list(range(5, 13)))
+    assert min(peer.inputs) == 12 - INPUT_BACKLOG + 1
+    assert peer.next_bits() == 12 - INPUT_BACKLOG + 1
+
+
+def test_repeated_inputs_are_applied_once():
+    peer = Peer(('127.0.0.1', 1), 0)
+    peer.add_inputs(2, [1, 2])
+    assert [peer.next_bits(), peer.next_bits()] == [1, 2]
+    peer.add_inputs(3, [1, 2, 4])
+    assert list(peer.inputs) == [3]
+    # nothing new arrived, the last input is repeated
+    assert [peer.next_bits(), peer.next_bits()] == [4, 4]
+    assert peer.applied == 3
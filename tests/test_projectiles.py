@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import projectiles
+from projectiles import ProjectilePool, ProjectileType
+
+TYPES = [ProjectileType('slow', -3.0, 'laser_player'), ProjectileType('fast', 6.0, 'laser_enemy')]
+BOUNDS = (-64, 0, 800, 600)
+FEW_SHOTS = projectiles.FEW_SHOTS
+
+
+def run_pool(seed: int, few: bool, ticks: int, monkeypatch) -> list:
+    # FEW_SHOTS picks the path, both pools fire and kill the same shots from the same seed
+    monkeypatch.setattr(projectiles, 'FEW_SHOTS', 1 << 62 if few else 0)
+    rng = np.random.default_rng(seed)
+    pool = ProjectilePool(TYPES, BOUNDS, capacity=16)
+    states = []
+    for _ in range(ticks):
+        if rng.random() < 0.3:
+            count = int(rng.integers(1, 4))
+            # whole pixels and sideways shots land exactly on the bounds, where < and <= differ
+            pool.spawn(int(rng.integers(len(TYPES))), rng.integers(-80, 820, count).astype(float),
+                       rng.integers(0, 600, count).astype(float), rng.choice([-90.0, -30.0, 0.0, 45.0, 90.0], count))
+        live = pool.live_slots()
+        if live.size and rng.random() < 0.1:
+            pool.kill(rng.choice(live, size=min(2, live.size), replace=False))
+        pool.update()
+        states.append((pool.x.copy(), pool.y.copy(), pool.prev_x.copy(), pool.prev_y.copy(), pool.alive.copy(),
+                       pool.free[:pool.free_count].copy(), pool.high_water))
+    return states
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_few_shots_match_the_numpy_step(seed, monkeypatch):
+    few = run_pool(seed, True, 600, monkeypatch)
+    vectorized = run_pool(seed, False, 600, monkeypatch)
+    # the high water mark moved on both sides of the real FEW_SHOTS
+    assert any(0 < state[6] <= FEW_SHOTS for state in few) and any(state[6] > FEW_SHOTS for state in few)
+    for tick, (expected, actual) in enumerate(zip(vectorized, few)):
+        for expected_field, actual_field in zip(expected[:6], actual[:6]):
+            assert np.array_equal(expected_field, actual_field), f'tick {tick}'
+        assert expected[6] == actual[6], f'tick {tick}'
@@ -0,0 +1,28 @@
+import random
+
+import pygame
+import pytest
+
+import bench_render
+import main
+
+
+@pytest.mark.parametrize('enemy_count', bench_render.ENEMY_COUNTS)
+def test_dirty_rendering_matches_full_redraw(display, enemy_count):
+    _, _, full_pixels = bench_render.play(enemy_count, True, 120)
+    _, _, dirty_pixels = bench_render.play(enemy_count, False, 120)
+    assert dirty_pixels == full_pixels
+
+
+@pytest.mark.parametrize('event_type', [pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.VIDEOEXPOSE])
+def test_exposed_window_is_drawn_whole(display, event_type):
+    random.seed(0)
+    game = main.Game(4)
+    game.render(0.0)
+    expected = pygame.image.tobytes(main.screen, 'RGB')
+    game.render(0.0)
+    # what a covered or minimized window may hold when it shows again
+    main.screen.fill((255, 0, 255))
+    game.handle_event(pygame.event.Event(event_type))
+    game.render(0.0)
+    assert pygame.image.tobytes(main.screen, 'RGB') == expected
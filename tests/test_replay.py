@@ -0,0 +1,35 @@
+import os
+import random
+
+import pytest
+
+import bench_replay
+import main
+from replay import Replay
+
+CATCH_UP_TICKS = 3  # ticks every frame of the windowed loop owes in the tests
+
+
+class CatchUpClock:
+    """
+    A stand-in for pygame.time.Clock that reports frames slow enough to owe several ticks each
+    """
+    def tick(self, framerate=0) -> float:
+        return CATCH_UP_TICKS * main.TICK_TIME * 1000
+
+    def get_fps(self) -> float:
+        return 0.0
+
+
+@pytest.mark.parametrize('ticks', [300, 301, 302])
+def test_game_loop_stops_at_the_end_of_the_replay(display, ticks):
+    replay = Replay.load(os.path.join(bench_replay.REPLAY_DIR, 'constant_fire.gwr'))
+    replay.ticks = ticks
+    expected = bench_replay.play(replay)
+
+    random.seed(replay.seed)
+    game = main.Game(replay.enemy_count, fire_mode=replay.fire_mode, replay=replay)
+    game.clock = CatchUpClock()
+    game.game_loop()
+    assert game.ticks == expected.ticks == ticks
+    assert bench_replay.checksum(game) == bench_replay.checksum(expected)
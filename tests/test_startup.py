@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_CHECK = '''
+import pygame
+import main
+assert not pygame.get_init(), 'pygame.init() was called'
+assert not pygame.display.get_init(), 'the display subsystem was started'
+assert pygame.display.get_surface() is None, 'a window was opened'
+assert not pygame.font.get_init(), 'the font subsystem was started'
+assert not pygame.mixer.get_init(), 'the mixer was started'
+assert main.screen is None, 'main.screen was set'
+'''
+
+
+def test_import_has_no_side_effects():
+    # a fresh interpreter, pygame state left over from other tests would hide a side effect
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    result = subprocess.run([sys.executable, '-c', IMPORT_CHECK], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr